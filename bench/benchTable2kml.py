@@ -0,0 +1,445 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+*********************************************************
+Programme : benchTable2kml.py
+Github : https://github.com/Thierry46/table2kml
+Auteur : Thierry Maillard (TMD)
+Date : 17/10/2026
+
+Role : Mesure les performances de chaque étape des programmes du projet
+        sur des données synthétiques de taille croissante :
+        - table2kml.py : readCSV, readExcel, formatData, genKMLFiles
+        - getDolmenWKPLot.py : getInfoFromWikipedia (analyse du texte wiki,
+          sans accès réseau, sur une page générée ou sauvegardée)
+        - taisne2cvs.py : processFile sur un texte au format du Taisne
+        Les résultats sont écrits dans un fichier JSON.
+        Un second mode compare deux fichiers résultats et signale les régressions.
+
+Prerequis :
+- Python v3.xxx : a télécharger depuis : https://www.python.org/downloads/
+- Modules nécessaires aux programmes mesurés (xlrd, pyproj...) :
+        une étape dont un module manque est notée en erreur dans les résultats.
+- module xlwt (facultatif, génère le fichier Excel de l'étape readExcel) :
+        sudo python3 -m pip install xlwt
+        Il n'est pas fourni avec le dépôt : sans lui, l'étape readExcel est notée
+        non mesurée dans les résultats.
+
+Usage : benchTable2kml.py [-h] [-v] [-n tailles] [-r nb_repetitions]
+                          [-d repertoire] [-w page_wiki.txt] [-o resultats.json]
+        benchTable2kml.py -c [-s seuil] reference.json nouveau.json
+Parametres :
+    -h ou --help : affiche cette aide.
+    -v ou --verbose : affiche les messages des programmes mesurés
+    -n ou --sizes tailles : nombres de lignes séparés par des virgules
+         (défaut : 1000,100000,1000000)
+    -r ou --repeat nb_repetitions : nombre de mesures par étape, la plus rapide
+         est conservée (défaut : 1)
+    -d ou --dir repertoire : répertoire des données générées, conservées et
+         réutilisées d'une mesure à l'autre (défaut : répertoire temporaire supprimé)
+    -w ou --wikitext page_wiki.txt : texte wiki sauvegardé de l'article
+         Sites mégalithiques du Lot, mesuré en plus des pages générées
+    -o ou --output resultats.json : fichier résultat
+         (défaut : bench_AAAA_MM_JJ_HHMMSS.json)
+    -c ou --compare : compare deux fichiers résultats, code retour 1 si une étape
+         est plus lente que la référence au-delà du seuil
+    -s ou --threshold seuil : écart en % au-delà duquel une étape est signalée
+         (défaut : 10)
+
+Sortie :
+    - Fichier JSON : plateforme et, pour chaque étape et taille, temps réel (s),
+      temps CPU (s) et nombre de lignes par seconde
+
+Exemples :
+./bench/benchTable2kml.py -n 1000,100000 -o avant.json
+./bench/benchTable2kml.py -n 1000,100000 -o apres.json
+./bench/benchTable2kml.py -c avant.json apres.json
+
+Copyright 2026 Thierry Maillard
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+Contact me at thierry.maillard500n@orange.fr
+*********************************************************
+"""
+import sys
+import getopt
+import time
+import platform
+import importlib.util
+import os
+import os.path
+import csv
+import json
+import random
+import shutil
+import tempfile
+import contextlib
+
+# Programmes mesurés : répertoire parent et sous-répertoire taisne
+_DIR_PROJECT_ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_DIR_PROJECT_, "taisne"))
+sys.path.insert(0, _DIR_PROJECT_)
+import table2kml # pylint: disable=C0413
+import getDolmenWKPLot # pylint: disable=C0413
+import taisne2cvs # pylint: disable=C0413
+
+VERSION_RESULTS = "1"
+# Tailles par défaut des données générées (nombre de lignes)
+SIZES_DEFAULT = (1000, 100000, 1000000)
+# Nombre maximum de lignes d'une feuille Excel 97
+_NB_ROWS_MAX_XLS_ = 65535
+# Graine du générateur : données identiques d'une mesure à l'autre
+_SEED_ = 46
+# Colonnes des tables générées, au format des fichiers Dolmen_*.csv
+TITLES_DOLMEN = ["Nom dolmen", "Lieu, autres noms", "Commune", "IGN", "Etat",
+                 "Lat. N (°)", "Long. E (°)", "Classement", "Remarques", "Pages Web",
+                 "-Notes"]
+
+##################################################
+# main function
+##################################################
+def main(argv=None):
+    """ Methode principale """
+    VERSION = 'v1.0 - 17/10/2026'
+    NOM_PROG = 'benchTable2kml.py'
+    isVerbose = False
+    isCompare = False
+    listSizes = list(SIZES_DEFAULT)
+    nbRepeat = 1
+    dirData = None
+    pathWikitext = None
+    pathResults = "bench_" + time.strftime("%Y_%m_%d_%H%M%S") + ".json"
+    threshold = 10.
+    title = (NOM_PROG + ' - ' + VERSION + " sur " +
+             platform.system() + " " + platform.release() +
+             " - Python : " + platform.python_version())
+    print(title)
+
+    if argv is None:
+        argv = sys.argv
+
+    try:
+        opts, args = getopt.getopt(argv[1:], "hvn:r:d:w:o:cs:",
+                                   ["help", "verbose", "sizes=", "repeat=", "dir=",
+                                    "wikitext=", "output=", "compare", "threshold="])
+    except getopt.error as msg:
+        print(msg)
+        print("To get help use --help ou -h")
+        sys.exit(1)
+    try:
+        for options in opts:
+            if options[0] in ("-h", "--help"):
+                print(__doc__)
+                sys.exit(0)
+            if options[0] in ("-v", "--verbose"):
+                isVerbose = True
+            if options[0] in ("-n", "--sizes"):
+                listSizes = [int(size) for size in options[1].split(",")]
+                if min(listSizes) < 1:
+                    raise ValueError(options[1])
+            if options[0] in ("-r", "--repeat"):
+                nbRepeat = int(options[1])
+                if nbRepeat < 1:
+                    raise ValueError(options[1])
+            if options[0] in ("-d", "--dir"):
+                dirData = options[1]
+            if options[0] in ("-w", "--wikitext"):
+                pathWikitext = options[1]
+            if options[0] in ("-o", "--output"):
+                pathResults = options[1]
+            if options[0] in ("-c", "--compare"):
+                isCompare = True
+            if options[0] in ("-s", "--threshold"):
+                threshold = float(options[1])
+    except ValueError as exc:
+        print("Valeur d'option incorrecte :", str(exc))
+        sys.exit(1)
+
+    if isCompare:
+        if len(args) != 2:
+            print(__doc__)
+            print("Nombre de paramètre invalide : 2 fichiers résultats nécessaires")
+            sys.exit(1)
+        nbRegressions = compareResults(args[0], args[1], threshold)
+        print('End', NOM_PROG, VERSION)
+        sys.exit(1 if nbRegressions > 0 else 0)
+
+    if len(args) != 0:
+        print(__doc__)
+        print("Aucun paramètre utilisé sans l'option -c !")
+        sys.exit(1)
+
+    isTempDir = dirData is None
+    if isTempDir:
+        dirData = tempfile.mkdtemp(prefix="benchTable2kml_")
+    os.makedirs(dirData, exist_ok=True)
+    try:
+        listResults = runBenchmarks(listSizes, dirData, nbRepeat, pathWikitext, isVerbose)
+    finally:
+        if isTempDir:
+            shutil.rmtree(dirData, ignore_errors=True)
+
+    with open(pathResults, 'w', encoding='utf-8') as hResults:
+        json.dump({'version':VERSION_RESULTS, 'date':time.strftime("%Y-%m-%d %H:%M:%S"),
+                   'platform':platform.platform(), 'python':platform.python_version(),
+                   'nbCPU':os.cpu_count(), 'nbRepeat':nbRepeat, 'results':listResults},
+                  hResults, indent=1, ensure_ascii=False)
+    print("Résultats écrits dans", pathResults)
+    print('End', NOM_PROG, VERSION)
+    sys.exit(0)
+
+def runBenchmarks(listSizes, dirData, nbRepeat, pathWikitext, isVerbose):
+    """ Mesure chaque étape pour chaque taille de listSizes
+        Retourne la liste des mesures (dictionnaires) """
+    listResults = []
+    canUseXLS = importlib.util.find_spec("xlrd") is not None and \
+                importlib.util.find_spec("xlwt") is not None
+
+    for nbRows in listSizes:
+        print("Taille", nbRows, "lignes :")
+        pathCSV = os.path.join(dirData, "dolmens_" + str(nbRows) + ".csv")
+        if not os.path.isfile(pathCSV):
+            writeDolmenCSV(pathCSV, generateDolmenRows(nbRows))
+
+        # table2kml : lecture, formatage et écriture KML enchaînés
+        result, (titleRow, rowData) = timeStage(
+            "table2kml.readCSV", nbRows, nbRepeat, isVerbose,
+            lambda: table2kml.readCSV(pathCSV, isVerbose))
+        listResults.append(result)
+
+        if not canUseXLS:
+            listResults.append(getSkippedResult("table2kml.readExcel", nbRows,
+                                                "modules xlrd et xlwt nécessaires"))
+        elif nbRows > _NB_ROWS_MAX_XLS_:
+            listResults.append(getSkippedResult("table2kml.readExcel", nbRows,
+                                                "limite Excel 97 de " +
+                                                str(_NB_ROWS_MAX_XLS_) + " lignes"))
+        else:
+            pathXLS = os.path.join(dirData, "dolmens_" + str(nbRows) + ".xls")
+            if not os.path.isfile(pathXLS):
+                writeDolmenXLS(pathXLS, titleRow, rowData)
+            listResults.append(timeStage("table2kml.readExcel", nbRows, nbRepeat, isVerbose,
+                                         lambda: table2kml.readExcel(pathXLS, isVerbose))[0])
+
+        result, (_, listInfoRead) = timeStage(
+            "table2kml.formatData", nbRows, nbRepeat, isVerbose,
+            lambda: table2kml.formatData(titleRow, rowData, ['Nom', 'Lat', 'Lon'], isVerbose))
+        listResults.append(result)
+        del rowData
+
+        pathKML = os.path.join(dirData, "dolmens_" + str(nbRows) + ".kml")
+        result = timeStage("table2kml.genKMLFiles", len(listInfoRead), nbRepeat, isVerbose,
+                           lambda: table2kml.genKMLFiles(listInfoRead, "Bench", "", pathKML,
+                                                         False, isVerbose))[0]
+        result['nbBytes'] = os.path.getsize(pathKML)
+        listResults.append(result)
+        del listInfoRead
+
+        # getDolmenWKPLot : analyse d'une page wiki générée
+        pathPage = os.path.join(dirData, "wikitext_" + str(nbRows) + ".txt")
+        if not os.path.isfile(pathPage):
+            with open(pathPage, 'w', encoding='utf-8') as hPage:
+                hPage.write(generateWikitext(nbRows))
+        listResults.append(timeWikitext(pathPage, nbRows, nbRepeat, isVerbose))
+
+        # taisne2cvs : texte au format du Taisne
+        pathTaisne = os.path.join(dirData, "taisne_" + str(nbRows) + ".txt")
+        if not os.path.isfile(pathTaisne):
+            writeTaisneText(pathTaisne, nbRows)
+        listResults.append(timeTaisne(pathTaisne, nbRows, nbRepeat, isVerbose))
+
+    if pathWikitext is not None:
+        print("Page wiki sauvegardée", pathWikitext, ":")
+        listResults.append(timeWikitext(pathWikitext, None, nbRepeat, isVerbose))
+    return listResults
+
+def timeStage(stage, nbRows, nbRepeat, isVerbose, function):
+    """ Exécute nbRepeat fois function et mesure le temps réel et CPU de la plus rapide
+        Les messages des programmes mesurés ne sont affichés qu'en mode bavard
+        Retourne le résultat de la mesure et la valeur retournée par function """
+    bestResult = None
+    valueReturned = None
+    for _ in range(nbRepeat):
+        wallStart = time.perf_counter()
+        cpuStart = time.process_time()
+        with contextlib.ExitStack() as stack:
+            if not isVerbose:
+                stack.enter_context(contextlib.redirect_stdout(
+                    stack.enter_context(open(os.devnull, 'w', encoding='utf-8'))))
+            valueReturned = function()
+        wallTime = time.perf_counter() - wallStart
+        cpuTime = time.process_time() - cpuStart
+        if bestResult is None or wallTime < bestResult['wallTime']:
+            bestResult = {'stage':stage, 'nbRows':nbRows, 'wallTime':round(wallTime, 6),
+                          'cpuTime':round(cpuTime, 6),
+                          'rowsPerSecond':round(nbRows / wallTime) if wallTime > 0. else None,
+                          'error':""}
+    print("  {:38s} {:10.3f} s réel {:10.3f} s CPU".format(
+        stage, bestResult['wallTime'], bestResult['cpuTime']))
+    return bestResult, valueReturned
+
+def timeWikitext(pathPage, nbRows, nbRepeat, isVerbose):
+    """ Mesure l'analyse par getDolmenWKPLot de la page wiki pathPage
+        nbRows : nombre de dolmens de la page, None : compté après analyse """
+    with open(pathPage, 'r', encoding='utf-8') as hPage:
+        page = hPage.read()
+    result, infos = timeStage("getDolmenWKPLot.getInfoFromWikipedia", nbRows or 0, nbRepeat,
+                              isVerbose,
+                              lambda: getDolmenWKPLot.parseInfoWikipedia(page, isVerbose))
+    if nbRows is None:
+        result['nbRows'] = len(infos[1]) + len(infos[3])
+        result['rowsPerSecond'] = round(result['nbRows'] / result['wallTime'])
+    result['nbBytes'] = len(page.encode('utf-8'))
+    return result
+
+def timeTaisne(pathTaisne, nbRows, nbRepeat, isVerbose):
+    """ Mesure la conversion par taisne2cvs du fichier pathTaisne """
+    try:
+        result = timeStage("taisne2cvs.processFile", nbRows, nbRepeat, isVerbose,
+                           lambda: taisne2cvs.processFile(pathTaisne, isVerbose))[0]
+        result['nbBytes'] = os.path.getsize(pathTaisne)
+    except Exception as exc: # pylint: disable=W0703
+        result = getSkippedResult("taisne2cvs.processFile", nbRows, str(exc))
+    return result
+
+def getSkippedResult(stage, nbRows, error):
+    """ Retourne le résultat d'une étape non mesurée """
+    print("  {:38s} non mesurée : {}".format(stage, error))
+    return {'stage':stage, 'nbRows':nbRows, 'wallTime':None, 'cpuTime':None,
+            'rowsPerSecond':None, 'error':error}
+
+def generateDolmenRows(nbRows):
+    """ Produit nbRows lignes synthétiques au format des fichiers Dolmen_*.csv :
+        communes et pages Web répétées, coordonnées décimales ou sexagésimales,
+        quelques cellules vides ou incorrectes comme dans les vraies tables """
+    generator = random.Random(_SEED_)
+    listCommunes = ["Commune" + str(numCommune) for numCommune in range(340)]
+    listEtats = ["Bon", "Moyen", "Ruiné", "Détruit", "?", ""]
+    for numRow in range(nbRows):
+        latitude = generator.uniform(44.2, 45.0)
+        longitude = generator.uniform(1.0, 2.2)
+        if numRow % 2:
+            latText = formatSexagesimal(latitude)
+            lonText = formatSexagesimal(longitude)
+        else:
+            latText = str(round(latitude, 5))
+            lonText = str(round(longitude, 5))
+        if numRow % 97 == 0:
+            latText = ""
+        commune = generator.choice(listCommunes)
+        yield ["Dolmen " + str(numRow), "Lieu-dit " + str(numRow % 1000), commune,
+               "2137 E", generator.choice(listEtats), latText, lonText,
+               "Inscrit MH" if numRow % 10 == 0 else "",
+               "Remarque " * (numRow % 5),
+               "https://fr.wikipedia.org/wiki/Dolmen_de_" + commune if numRow % 3 else "",
+               "note interne"]
+
+def formatSexagesimal(angle):
+    """ Retourne le texte sexagésimal 44°51'37" d'un angle en degrés décimaux """
+    degres = int(angle)
+    minutes = int((angle - degres) * 60.)
+    secondes = int(round(((angle - degres) * 60. - minutes) * 60.)) % 60
+    return "{:d}°{:02d}'{:02d}\"".format(degres, minutes, secondes)
+
+def writeDolmenCSV(pathCSV, rowIter):
+    """ Ecrit la table synthétique au format CSV lu par table2kml """
+    with open(pathCSV, 'w', encoding='utf-8', newline='') as hCSV:
+        writer = csv.writer(hCSV, delimiter=',', quoting=csv.QUOTE_ALL)
+        writer.writerow(TITLES_DOLMEN)
+        writer.writerows(rowIter)
+
+def writeDolmenXLS(pathXLS, titleRow, rowData):
+    """ Ecrit la table synthétique au format Excel 97, colonne Pages Web en liens """
+    import xlwt
+    workbook = xlwt.Workbook(encoding='utf-8')
+    sheet = workbook.add_sheet("Dolmens")
+    for numCol, titleCol in enumerate(titleRow):
+        sheet.write(0, numCol, titleCol)
+    for numRow, row in enumerate(rowData, start=1):
+        for numCol, titleCol in enumerate(titleRow):
+            value = row[titleCol]
+            if value.startswith("http"):
+                value = xlwt.Formula('HYPERLINK("' + value + '";"Lien")')
+            sheet.write(numRow, numCol, value)
+    workbook.save(pathXLS)
+
+def generateWikitext(nbRows):
+    """ Retourne une page wiki au format de l'article Sites mégalithiques du Lot :
+        nbRows dolmens répartis entre la section carte et la section liste """
+    generator = random.Random(_SEED_)
+    listLines = ["Introduction de l'article.", "{{Début de carte}}"]
+    for numRow in range(nbRows // 2):
+        listLines.append("{{G|Lot|" + str(round(generator.uniform(44.2, 45.0), 5)) + "|" +
+                         str(round(generator.uniform(1.0, 2.2), 5)) + "|Dolmen de la carte {{n°|" +
+                         str(numRow) + "}}|Grotte sans toponyme}}")
+    listLines += ["{{Fin de carte}}", "== Liste non exhaustive ==",
+                  '{| class="wikitable sortable"', "|-",
+                  "! Monument !! Commune !! Lieu !! Protection !! Localisation !! Image"]
+    for numRow in range(nbRows - nbRows // 2):
+        listLines += ["|-",
+                      "| [[Dolmen de la liste " + str(numRow) + "]]<ref>Source " +
+                      str(numRow % 50) + "</ref> || [[Commune" + str(numRow % 340) +
+                      "]] || Lieu-dit " + str(numRow % 1000) + " || " +
+                      ("Inscrit MH<ref name=mh/>" if numRow % 10 == 0 else "") +
+                      " || {{coord|" + str(round(generator.uniform(44.2, 45.0), 5)) + "|" +
+                      str(round(generator.uniform(1.0, 2.2), 5)) + "}} || [[Fichier:D.jpg]]"]
+    listLines += ["|}", "== Références =="]
+    return "\n".join(listLines) + "\n"
+
+def writeTaisneText(pathTaisne, nbRows):
+    """ Ecrit un texte au format du Taisne en répétant les fiches du fichier exemple
+        taisne/taisne.txt jusqu'à dépasser nbRows entrées de cavités """
+    pathSample = os.path.join(_DIR_PROJECT_, "taisne", "taisne.txt")
+    with open(pathSample, 'r', encoding='utf-8') as hSample:
+        listLines = hSample.read().splitlines()
+    nbEntriesSample = sum(1 for line in listLines if " - " in line and "m (IGN" in line)
+    nbCopies = max(1, -(-nbRows // max(nbEntriesSample, 1)))
+    with open(pathTaisne, 'w', encoding='utf-8') as hTaisne:
+        hTaisne.write(listLines[0] + "\n")
+        for _ in range(nbCopies):
+            hTaisne.write("\n".join(listLines[1:]) + "\n")
+
+def compareResults(pathReference, pathNew, threshold):
+    """ Compare les temps réels des étapes de deux fichiers résultats
+        Signale les étapes plus lentes ou plus rapides de plus de threshold %
+        Retourne le nombre de régressions """
+    with open(pathReference, 'r', encoding='utf-8') as hReference:
+        reference = json.load(hReference)
+    with open(pathNew, 'r', encoding='utf-8') as hNew:
+        new = json.load(hNew)
+    dictReference = {(result['stage'], result['nbRows']):result
+                     for result in reference['results']}
+
+    print("Référence :", pathReference, reference['date'], reference['python'])
+    print("Nouveau   :", pathNew, new['date'], new['python'])
+    print("{:38s} {:>9s} {:>11s} {:>11s} {:>8s}".format("Etape", "Lignes",
+                                                         "Réf. (s)", "Nouv. (s)", "Ecart"))
+    nbRegressions = 0
+    for result in new['results']:
+        resultRef = dictReference.get((result['stage'], result['nbRows']))
+        if resultRef is None or not resultRef['wallTime'] or not result['wallTime']:
+            continue
+        delta = (result['wallTime'] / resultRef['wallTime'] - 1.) * 100.
+        verdict = ""
+        if delta > threshold:
+            verdict = "REGRESSION"
+            nbRegressions += 1
+        elif delta < -threshold:
+            verdict = "amélioration"
+        print("{:38s} {:9d} {:11.3f} {:11.3f} {:+7.1f}% {}".format(
+            result['stage'], result['nbRows'], resultRef['wallTime'], result['wallTime'],
+            delta, verdict))
+    print(nbRegressions, "régressions au-delà de", threshold, "%")
+    return nbRegressions
+
+#to be called as a script:python benchTable2kml.py or benchTable2kml.py
+if __name__ == "__main__":
+    main()
@@ -12,16 +12,24 @@ Role : Extrait de Wikipedia la liste des dolmens du Lot et
 
 Prerequis :
 - Python v3.xxx : a télécharger depuis : https://www.python.org/downloads/
+- module pyarrow (facultatif, option -p) : sudo python3 -m pip install pyarrow
+- table2kml.py dans le même répertoire (facultatif, option --profile)
 
-Usage : getDolmenWKPLot.py [-h] [-v]
+Usage : getDolmenWKPLot.py [-h] [-v] [-p] [--profile=rapport.json] [--cprofile=fichier.prof]
 Fonctionne en batch avec 1 parametre.
 
 Parametres :
     -h ou --help : affiche cette aide.
     -v ou --isVerbose : mode bavard
+    -p ou --parquet : écrit aussi les résultats au format colonnes Parquet
+    --profile=rapport.json : mesure chaque étape (téléchargement, analyse, écriture) :
+         temps écoulé, temps CPU, lignes/s et octets, écrits dans le fichier JSON rapport.json
+    --cprofile=fichier.prof : profile le programme avec cProfile et écrit les statistiques
+         dans fichier.prof (lire avec : python3 -m pstats fichier.prof)
 
 Sortie :
 - Fichier .csv compatible avec le programme de conversion csv -> kml : table2kml
+- Avec -p, fichier .parquet de même contenu, lu aussi par table2kml
 
 Qualité :
 Pylint :
@@ -50,8 +58,11 @@ import sys
 import getopt
 import time
 import platform
+import os.path
+import importlib.util
 import re
 import csv
+import contextlib
 import urllib.request
 import urllib.error
 import urllib.parse
@@ -84,16 +95,23 @@ __REGEXP_COORD_DECIMAL2__ =\
                    r'[ ]*(?P<Lon>\d*\.\d*)[ ]*' +
                    r'\|(?P<Nom>.*)\|.*sans toponyme\}\}')
 
+# Mesure des étapes (option --profile) : StageProfiler de table2kml.py, importé
+# seulement avec cette option
+_PROFILER_ = None
 
 ##################################################
 # main function
 ##################################################
 def main(argv=None):
     """ Fonction principale """
+    global _PROFILER_ # pylint: disable=W0603
     VERSION = 'v2.2 - 11/12/2021'
     NOM_PROG = 'getDolmenWKPLot.py'
     NOM_ARTICLE_WIKIPEDIA = 'Sites mégalithiques du Lot'
     isVerbose = False
+    isParquet = False
+    pathProfile = None
+    profiler = None
     title = NOM_PROG + ' - ' + VERSION + " sur " + platform.system() + " " + platform.release() + \
             " - Python : " + platform.python_version()
     print(title)
@@ -103,7 +121,8 @@ def main(argv=None):
 
     # parse command line options
     try:
-        opts, args = getopt.getopt(argv[1:], "hv", ["help", "isVerbose"])
+        opts, args = getopt.getopt(argv[1:], "hvp", ["help", "isVerbose", "parquet",
+                                                     "profile=", "cprofile="])
     except getopt.error as msg:
         print(msg)
         print("To get help use --help ou -h")
@@ -118,30 +137,79 @@ def main(argv=None):
             isVerbose = True
             print("Mode isVerbose : bavard pour debug")
 
+        if options[0] in ("-p", "--parquet"):
+            if importlib.util.find_spec("pyarrow") is None:
+                print("Erreur : Module pyarrow non disponible !")
+                sys.exit(1)
+            isParquet = True
+            print("Ecriture des résultats aussi au format Parquet")
+
+        if options[0] == "--profile":
+            if importlib.util.find_spec("table2kml") is None:
+                print("Erreur : table2kml.py absent, option --profile indisponible !")
+                sys.exit(1)
+            from table2kml import StageProfiler
+            pathProfile = options[1]
+            _PROFILER_ = StageProfiler()
+            _PROFILER_.isEnabled = True
+            print("Mesure des étapes, rapport :", pathProfile)
+
+        if options[0] == "--cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            pathCProfile = options[1]
+            print("Profilage cProfile, fichier :", pathCProfile)
+
     if len(args) != 0:
         print(__doc__)
         print("Aucun paramètre utilisé !")
         sys.exit(2)
 
+    if profiler is not None:
+        profiler.enable()
     try:
         columnTitleMap, listInfoReadMap, columnTitleArticle, listInfoReadArticle = \
                 getInfoFromWikipedia(NOM_ARTICLE_WIKIPEDIA, isVerbose)
         writeCSV(columnTitleMap, listInfoReadMap, "carte")
         writeCSV(columnTitleArticle, listInfoReadArticle, "liste")
+        if isParquet:
+            writeParquet(columnTitleMap, listInfoReadMap, "carte")
+            writeParquet(columnTitleArticle, listInfoReadArticle, "liste")
 
     except ValueError as exc:
         print(str(exc))
 
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(pathCProfile)
+        print("Statistiques cProfile écrites :", pathCProfile)
+    if pathProfile is not None:
+        _PROFILER_.writeReport(pathProfile, NOM_PROG, VERSION)
     print('End getDolmenWKPLot.py', VERSION)
     sys.exit(0)
 
+def measureStage(nameStage, pathFile=""):
+    """ Mesure l'étape avec _PROFILER_ si option --profile, sinon ne fait rien """
+    if _PROFILER_ is None:
+        return contextlib.nullcontext({})
+    return _PROFILER_.stage(nameStage, pathFile)
+
 def getInfoFromWikipedia(nomArticleWikipedia, isVerbose):
     """ Extrait les info sur les dolmens de la page Wikipedia du Lot """
 
     print("Recup des dolmens de l'article :", nomArticleWikipedia, "...")
     nomArticleUrl = urllib.request.pathname2url(nomArticleWikipedia)
-    page = getPageWikipediaFr(nomArticleUrl, isVerbose)
-
+    with measureStage("téléchargement", nomArticleWikipedia) as infoStage:
+        page = getPageWikipediaFr(nomArticleUrl, isVerbose)
+        infoStage['nbBytes'] = len(page.encode('utf-8'))
+    with measureStage("analyse", nomArticleWikipedia) as infoStage:
+        infoWikipedia = parseInfoWikipedia(page, isVerbose)
+        infoStage['nbRows'] = len(infoWikipedia[1]) + len(infoWikipedia[3])
+    return infoWikipedia
+
+def parseInfoWikipedia(page, isVerbose):
+    """ Extrait les info sur les dolmens du texte wiki (wikitext) de la page
+        Retourne les titres et lignes de la section carte et de la section liste """
     listInfoReadMap = []
     listMessage = []
     columnTitleMap = ['Nom', 'Lat', 'Lon', 'Commune']
@@ -413,11 +481,34 @@ def writeCSV(columnTitle, listInfoRead, typeOutput):
 
     titleCSVFile = "wikipedia_fr_" + typeOutput + "_" + time.strftime("%Y_%m_%d") + ".csv"
     print("Ecriture des résultats dans", titleCSVFile, "...")
-    with open(titleCSVFile, 'w', newline='', encoding='utf-8') as hFicCSV:
-        writer = csv.writer(hFicCSV, delimiter=',', quoting=csv.QUOTE_ALL)
-        writer.writerow(columnTitle)
-        for dolmen in listInfoRead:
-            writer.writerow(dolmen)
+    with measureStage("écriture csv", titleCSVFile) as infoStage:
+        with open(titleCSVFile, 'w', newline='', encoding='utf-8') as hFicCSV:
+            writer = csv.writer(hFicCSV, delimiter=',', quoting=csv.QUOTE_ALL)
+            writer.writerow(columnTitle)
+            for dolmen in listInfoRead:
+                writer.writerow(dolmen)
+        infoStage['nbRows'] = len(listInfoRead)
+        infoStage['nbBytes'] = os.path.getsize(titleCSVFile)
+
+def writeParquet(columnTitle, listInfoRead, typeOutput):
+    """ Ecrit les informations dans un fichier Parquet, une colonne texte par titre,
+        même contenu que le fichier CSV écrit par writeCSV """
+    import pyarrow
+    import pyarrow.parquet
+
+    if len(listInfoRead) == 0:
+        raise ValueError("Aucun dolmen à écrire !")
+
+    titleParquetFile = "wikipedia_fr_" + typeOutput + "_" + time.strftime("%Y_%m_%d") + ".parquet"
+    print("Ecriture des résultats dans", titleParquetFile, "...")
+    with measureStage("écriture parquet", titleParquetFile) as infoStage:
+        columns = [pyarrow.array([str(dolmen[numCol]) for dolmen in listInfoRead],
+                                 type=pyarrow.string())
+                   for numCol in range(len(columnTitle))]
+        pyarrow.parquet.write_table(pyarrow.Table.from_arrays(columns, names=columnTitle),
+                                    titleParquetFile)
+        infoStage['nbRows'] = len(listInfoRead)
+        infoStage['nbBytes'] = os.path.getsize(titleParquetFile)
 
 def getPageWikipediaFr(nomArticleUrl, isVerbose):
     """
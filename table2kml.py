@@ -11,6 +11,8 @@ Role : Convertir les coordonnées et informations contenues dans un fichier
         au format KML importable dans Geoportail.
         Deux formats pour le fichier d'entrée sont supportés :
         - Excel 97 (1ère feuille du classeur)
+        - Excel .xlsx (1ère feuille du classeur, lue ligne par ligne)
+        - Parquet .parquet ou Arrow .arrow (colonnes utiles seules lues, par paquets)
         - format CSV de format plus souple à utiliser de préférence.
 
         Le fichier d'entrée doit contenir des colonnes commençant par :
@@ -22,25 +24,126 @@ Role : Convertir les coordonnées et informations contenues dans un fichier
 
 Prerequis :
 - Python v3.xxx : a télécharger depuis : https://www.python.org/downloads/
-- module simplekml : sudo python3 -m pip install simplekml
+- module simplekml (facultatif, option -k) : sudo python3 -m pip install simplekml
 - module xlrd (facultatif pour fichier Excel) :
         sudo python3 -m pip install xlrd
+- module openpyxl (facultatif pour fichier Excel .xlsx) :
+        sudo python3 -m pip install openpyxl
+- module pyarrow (facultatif pour fichier .parquet ou .arrow) :
+        sudo python3 -m pip install pyarrow
+- module numpy (facultatif, conversion rapide des coordonnées) :
+        sudo python3 -m pip install numpy
 
 Environnement :
 Ce programme teste son environnement (modules python disponibles)
 et s'y adaptera.
 tkinter : pour IHM : facultatif (mode batch alors seul)
 xlrd : pour lire le fichier Excel (obligatoire pour traiter fichier .xls en entrée)
-simplekml : pour ecrire le fichier resultat kml (obligatoire)
-
-Usage : table2kml.py [-h] [-v] [-i] [Chemin_fichier Nom_calque [url_picto]]
+openpyxl : pour lire le fichier Excel .xlsx (obligatoire pour traiter fichier .xlsx en entrée)
+pyarrow : pour lire les fichiers .parquet et .arrow (obligatoire pour ces fichiers en entrée)
+numpy : pour convertir les colonnes de coordonnées par paquets (facultatif)
+simplekml : pour ecrire le fichier resultat kml avec l'option -k (facultatif)
+        Sans ce module, le fichier KML est écrit directement, élément par élément.
+
+Usage : table2kml.py [-h] [-v] [-i] [-o] [-s] [-k] [-u] [-z] [-q nb_max] [-g nb_niveaux]
+                     [-f formats] [-d modele] [--profile=rapport.json] [--cprofile=fichier.prof]
+                     [--memory] [--memory-max=Mo] [Chemin_fichier Nom_calque [url_picto]]
+        table2kml.py -b [-j nb_process] [-t Nom_calque] [-p url_picto]
+                     [-v] [-i] [-o] [-s] [-k] [-u] [-z] [-q nb_max] [-g nb_niveaux]
+                     [-f formats] [-d modele] [--profile=rapport.json] [--cprofile=fichier.prof]
+                     [--memory] [--memory-max=Mo] Chemin [Chemin ...]
+        table2kml.py --server [--port=port] [-j nb_process] [-t Nom_calque] [-p url_picto]
+                     [-v] [-i] [-o] [-s] [-k] [-u] [-z] [-q nb_max] [-g nb_niveaux]
+                     [-f formats] [-d modele]
+        table2kml.py -m distance_m [-r] [-t Nom_calque] [-p url_picto] [-d modele]
+                     [-v] [-i] [-o] [-z] Chemin_resultat.kml Chemin [Chemin ...]
 Sans paramètre, lance une IHM, sinon fonctionne en batch avec 1 parametre.
+Dans l'IHM, les fichiers sont convertis en tâche de fond, un à un dans l'ordre des clics
+sur "Traiter le fichier" : la barre de progression indique les lignes lues et les lignes/s,
+le bouton "Annuler" arrête la conversion en cours et celles en attente.
 Parametres :
     -h ou --help : affiche cette aide.
     -v ou --verbose : mode bavard
     -i : Le fichier picto désigné par une URL (http...) est téléchargé et inclus dans le fichier KML
          Les fichier locaux sont toujoursencodés en base64  et inclus dans le fichier KML.
-    Nom d'un fichier de données Excel .xls ou .csv (mode batch)
+         Le picto téléchargé est conservé dans un cache disque (~/.cache/table2kml ou
+         répertoire désigné par la variable d'environnement TABLE2KML_CACHE)
+         et revalidé à chaque conversion.
+    -o ou --offline : le picto téléchargé est lu dans le cache, sans accès réseau.
+    -s ou --stream : mode flux pour les gros fichiers : les lignes sont lues, formatées
+         et écrites une à une sans conserver la table en mémoire.
+    -k ou --simplekml : écrit le fichier KML avec le module simplekml (ancienne méthode)
+    -z ou --kmz : écrit une archive KMZ compressée (extension .kmz) au lieu d'un fichier KML,
+         le picto inclus (-i ou fichier local) y est stocké une seule fois en binaire.
+    -q ou --tiles nb_max : pour les très gros calques, découpe le calque en tuiles
+         (quadtree) d'au plus nb_max éléments, écrites dans le répertoire <nom>_tuiles.
+         Le fichier KML relie les tuiles par des NetworkLink munis de leur Region :
+         Google Earth ne charge que les tuiles visibles.
+    -g ou --cluster nb_niveaux : pour les zones denses, regroupe les éléments
+         proches sur une grille à nb_niveaux niveaux de zoom : au zoom faible,
+         un élément indique le nombre d'éléments de chaque case de la grille,
+         les éléments eux-mêmes ne sont affichés qu'au zoom fort (Region KML).
+    -f ou --formats formats : écrit en une seule lecture plusieurs fichiers résultat,
+         formats séparés par des virgules parmi : kml, kmz, geojson, csv
+         (csv : table normalisée Nom, Latitude, Longitude, Commune, Description
+         en degrés décimaux, fichier <nom>_normalise.csv). Ex. : -f kml,geojson
+         Les fichiers sont écrits simultanément à partir des mêmes éléments.
+    -d ou --description modele : fichier texte modèle de la bulle d'info :
+         du HTML où {Titre colonne} est remplacé par la valeur de la colonne
+         (ou de la première dont le titre commence par Titre colonne),
+         une ligne contenant des champs n'est écrite que si tous sont renseignés.
+         {{ et }} s'écrivent { et } (CSS, JavaScript...).
+         Ex. : <h2>{Nom}</h2>
+               <b>Commune</b> : {Commune}<br/>
+         Sans modèle : une ligne <b>Titre</b> : valeur<br/> par colonne.
+    -u ou --incremental : ne formate que les lignes nouvelles ou modifiées depuis la
+         conversion précédente, les autres sont reprises du fichier annexe .kml.cache.json
+         écrit à côté du fichier KML. Les lignes ne sont réutilisées que si le fichier
+         est reconverti vers le même fichier KML, sauf avec --reuse.
+    --reuse=ancien.kml : avec -u, pour un seul fichier : reprend les lignes inchangées du
+         fichier annexe de ancien.kml (ancien.kml.cache.json), résultat de la conversion
+         d'une version précédente de la table sous un autre nom.
+         Ex. : ./table2kml.py -u --reuse=Dolmen_v0.7.kml Dolmen_v0.8.csv "Dolmens"
+    -b ou --batch : convertit plusieurs fichiers : les paramètres sont des chemins de fichiers,
+         de répertoires (tous leurs fichiers .csv, .xls, .xlsx, .parquet et .arrow) ou des motifs (ex. : "data/*.csv").
+         Les fichiers CSV écrits par table2kml (_normalise.csv, _doublons.csv) sont ignorés.
+         Les conversions sont réparties sur plusieurs processus,
+         un bilan par fichier est affiché et le code retour vaut 3 si un fichier est en erreur.
+    -j ou --jobs nb_process : nombre de processus en mode -b (défaut : nombre de coeurs)
+         Pour un seul fichier : nombre de processus se partageant le formatage des lignes
+         (défaut : 1), utile pour les très gros fichiers.
+    -m ou --merge distance_m : fusionne dans Chemin_resultat.kml les éléments des fichiers
+         suivants (mêmes formes que pour -b). Deux éléments de fichiers différents,
+         distants de moins de distance_m mètres et de noms voisins, sont des doublons :
+         seul le premier est conservé, les doublons sont listés dans
+         Chemin_resultat_doublons.csv. La recherche utilise un index spatial en grille.
+    -r ou --report : en mode -m, liste les doublons sans les retirer du calque.
+    -t ou --title Nom_calque : titre des calques en mode -b et -m (défaut : nom du fichier)
+    -p ou --picto url_picto : pictogramme des calques en mode -b et -m
+    --profile=rapport.json : mesure chaque étape de la conversion (ouverture, lecture,
+         formatage, écriture, picto) : temps écoulé, temps CPU, lignes/s et octets,
+         écrits dans le fichier JSON rapport.json. En mode -b : étapes de chaque fichier.
+         Avec --profile, la table est lue entièrement avant le formatage pour séparer
+         les deux mesures (sauf en mode -s ou -u : une seule étape de conversion).
+    --cprofile=fichier.prof : profile le programme avec cProfile et écrit les statistiques
+         dans fichier.prof (lire avec : python3 -m pstats fichier.prof).
+         En mode -b avec plusieurs processus, seul le processus principal est profilé.
+    --memory : affiche pour chaque étape le pic et le reste de mémoire allouée par Python
+         (tracemalloc), le RSS max du processus et la taille estimée des lignes lues
+         (lecture) et des éléments formatés (formatage), ajoutés au rapport de --profile.
+         Le suivi tracemalloc ralentit la conversion.
+    --memory-max=Mo : arrête la conversion avec une erreur si le processus dépasse Mo
+         mégaoctets (RSS courant, à défaut mémoire allouée par Python), vérifié à chaque paquet
+         de lignes lues et à la fin de chaque étape. En mode -b : limite par processus,
+         le fichier est signalé en erreur.
+    --server : serveur de conversion : reste lancé, modules chargés, et convertit
+         les fichiers envoyés par table2kmlClient.py (ou par requête POST JSON sur
+         http://127.0.0.1:port/conversion) avec les options données au serveur.
+         Les conversions sont réparties sur nb_process processus (-j) lancés une fois,
+         les requêtes sont refusées au-delà de 8 conversions en attente par processus.
+         Le serveur n'écoute que la machine locale. Arrêt par Ctrl-C.
+    --port=port : port local du serveur (défaut : 8146)
+    Nom d'un fichier de données Excel .xls, .xlsx, .csv, .parquet ou .arrow (mode batch)
     Titre du calque codé dans le fichier KML : Ex.: "Dolmen Adrien" (mode batch)
     URL ou nom local du fichier pictogramme qui apparaîtra sur chaque lieu : (déconseillé)
     Geoportail ne supporte plus les pictogrammes dans le KML depuis 2021.
@@ -51,7 +154,8 @@ Parametres :
     https://upload.wikimedia.org/wikipedia/commons/c/cc/5_ldf.png (T4T35)
 
 Sortie :
-    - Fichier de même nom que fichier d'entrée mais avec extension .kml
+    - Fichier de même nom que fichier d'entrée mais avec extension .kml (.kmz avec -z)
+    - Avec -f : un fichier par format (.kml, .kmz, .geojson, _normalise.csv)
 
 Exemples de lancement par ligne de commande sous Linux et Mac :
 =====================
@@ -60,6 +164,13 @@ cd dossier application
 ./table2kml.py Dolmen_csv_v0.6.csv "Dolmens Adrien"
 Conversion batch d'un fichier Excel 97 :
 ./table2kml.py Dolmen_v0.6.xls "Dolmens Adrien"
+Conversion de tous les fichiers d'un répertoire sur 4 processus :
+./table2kml.py -b -j 4 data
+Serveur de conversion sur 4 processus, puis envoi de fichiers :
+./table2kml.py --server -j 4 &
+./table2kmlClient.py data/*.csv
+Fusion des sources Wikipedia et Adrien, doublons à moins de 100 m :
+./table2kml.py -m 100 -t "Dolmens du Lot" dolmens.kml wikipedia_fr_*.csv Dolmen_v0.9.xls
 Lancement IHM :
 ./table2kml.py
 
@@ -95,14 +206,82 @@ Contact me at thierry.maillard500n@orange.fr
 import sys
 import getopt
 import time
-import importlib
+import importlib.util
 import os
 import os.path
 import platform
 import re
 import getpass
 import urllib.request
+import urllib.parse
+import urllib.error
 import base64
+import io
+import zipfile
+import contextlib
+import itertools
+import glob
+import concurrent.futures
+import collections
+import hashlib
+import json
+import functools
+import xml.sax.saxutils
+import xml.etree.ElementTree
+import posixpath
+import csv
+import math
+import unicodedata
+import difflib
+import threading
+import queue
+
+# For performance : calculated once
+# re OK pour expression du type 44°51'37" ou 1°51'37" ou 1°51'37"" ou 1°51'37" "
+__REGEXP_COORD_SEXAGESIMAL__ = \
+        re.compile(r'(?P<degres>[\d]{1,2})°(?P<minutes>[\d]{2})\'(?P<secondes>[\d]{2})"')
+# Même expression appliquée à un texte contenant une valeur par ligne :
+# exactement un résultat par ligne, groupes vides si la ligne ne contient pas de coordonnée
+__REGEXP_COORD_SEXAGESIMAL_LINES__ = \
+        re.compile(r'^(?:.*?([\d]{1,2})°([\d]{2})\'([\d]{2})")?.*$', re.MULTILINE)
+# Lien HTTP : nom du site et identifiant de la page
+__REGEXP_SITE__ = re.compile(r'^http[s]?://(?P<siteName>.+?)/.*?(?P<id>[\w=. ]+)$')
+# Champ {Titre colonne} d'un modèle de description, ou accolade doublée {{ ou }}
+__REGEXP_TEMPLATE_FIELD__ = re.compile(r'\{\{|\}\}|\{(?P<field>[^{}\n]+)\}')
+# Nombre de lignes traitées ensemble lors du formatage
+_SIZE_CHUNK_ = 4096
+# Nombre d'URL mises en forme HTML conservées par formateURL
+_SIZE_CACHE_URL_ = 8192
+# Module psutil (facultatif) : RSS courant lu par StageProfiler à chaque paquet de lignes
+_CAN_USE_PSUTIL_ = importlib.util.find_spec("psutil") is not None
+# Extensions des fichiers convertis en mode -b
+EXT_TABLES = (".csv", ".xls", ".xlsx", ".parquet", ".arrow")
+# Fins des noms des fichiers CSV écrits par les options -f csv et -m, ignorés en mode -b
+SUFFIX_NORMALISE = "_normalise.csv"
+SUFFIX_DOUBLONS = "_doublons.csv"
+# Fichier annexe du mode incrémental : empreintes des lignes et Placemarks KML
+EXT_CACHE = ".cache.json"
+VERSION_CACHE = "1"
+# Tuiles : taille minimale à l'écran (pixels) d'une Region pour charger son contenu,
+# profondeur maximale du quadtree, taille minimale (degrés) d'une Region
+MIN_LOD_PIXELS = 128
+_DEPTH_MAX_TILES_ = 16
+_SIZE_BBOX_MIN_ = 0.001
+# Regroupements : taille à l'écran (pixels) d'une case à partir de laquelle
+# elle est détaillée par le niveau suivant
+_SIZE_CLUSTER_PIXELS_ = 256
+_NB_LEVELS_CLUSTER_MAX_ = 20
+# Fusion : similarité minimale (0 à 1) des noms de deux doublons
+_SIMILARITY_NAME_MIN_ = 0.7
+# IHM : période de lecture des messages de la conversion en tâche de fond (ms)
+_PERIOD_POLL_GUI_ = 100
+# Serveur de conversion : port local par défaut et
+# nombre de conversions en attente admises par processus de conversion
+_PORT_SERVER_ = 8146
+_NB_JOBS_WAITING_ = 8
+# Formats de sortie de l'option -f
+FORMATS_OUTPUT = ("kml", "kmz", "geojson", "csv")
+__REGEXP_NOT_ALNUM__ = re.compile(r'[^0-9a-z]+')
 
 ##################################################
 # main function
@@ -113,6 +292,25 @@ def main(argv=None):
     NOM_PROG = 'table2kml.py'
     isVerbose = False
     includePicto = False
+    isStreaming = False
+    useSimplekml = False
+    isBatch = False
+    nbProcess = None
+    isIncremental = False
+    isKMZ = False
+    nbMaxTile = 0
+    nbLevelsCluster = 0
+    distanceMerge = 0.
+    isCollapse = True
+    listFormats = None
+    templateText = None
+    titleBatch = None
+    URLPictoBatch = ""
+    pathProfile = None
+    pathCProfile = None
+    pathKMLReuse = None
+    isServer = False
+    portServer = _PORT_SERVER_
     title = (NOM_PROG + ' - ' + VERSION + " sur " +
              platform.system() + " " + platform.release() +
              " - Python : " + platform.python_version())
@@ -122,9 +320,7 @@ def main(argv=None):
     # Test presence des modules tkinter, xlrd, simplekml
     canUseGUI = importlib.util.find_spec("tkinter") is not None
     canUseXLS = importlib.util.find_spec("xlrd") is not None
-    if not importlib.util.find_spec("simplekml"):
-        print("Erreur : Module simplekml OK : export en KML autorisé")
-        sys.exit(1)
+    canUseSimplekml = importlib.util.find_spec("simplekml") is not None
 
     if argv is None:
         argv = sys.argv
@@ -132,7 +328,15 @@ def main(argv=None):
     # parse command line options
     dirProject = os.path.dirname(os.path.abspath(sys.argv[0]))
     try:
-        opts, args = getopt.getopt(argv[1:], "hvi", ["help", "verbose", "include"])
+        opts, args = getopt.getopt(argv[1:], "hvioskuzq:g:m:rf:d:bj:t:p:",
+                                   ["help", "verbose", "include", "offline",
+                                    "stream", "simplekml",
+                                    "incremental", "kmz", "tiles=", "cluster=",
+                                    "merge=", "report", "formats=",
+                                    "description=",
+                                    "batch", "jobs=", "title=", "picto=",
+                                    "profile=", "cprofile=", "memory", "memory-max=",
+                                    "server", "port=", "reuse="])
     except getopt.error as msg:
         print(msg)
         print("To get help use --help ou -h")
@@ -151,7 +355,168 @@ def main(argv=None):
             includePicto = True
             print("Inclus le picto dans le fichier KML")
 
-    if len(args) < 1:
+        if options[0] in ("-o", "--offline"):
+            _PICTO_CACHE_.isOffline = True
+            print("Mode hors ligne : picto lu dans le cache")
+
+        if options[0] in ("-s", "--stream"):
+            isStreaming = True
+            print("Mode flux : table non conservée en mémoire")
+
+        if options[0] in ("-k", "--simplekml"):
+            if not canUseSimplekml:
+                print("Erreur : Module simplekml non disponible !")
+                sys.exit(1)
+            useSimplekml = True
+            print("Ecriture du fichier KML avec le module simplekml")
+
+        if options[0] in ("-u", "--incremental"):
+            isIncremental = True
+            print("Mode incrémental : seules les lignes modifiées sont formatées")
+
+        if options[0] in ("-z", "--kmz"):
+            isKMZ = True
+            print("Ecriture d'une archive KMZ compressée")
+
+        if options[0] in ("-q", "--tiles"):
+            try:
+                nbMaxTile = int(options[1])
+                if nbMaxTile < 1:
+                    raise ValueError(options[1])
+            except ValueError:
+                print("Nombre maximum d'éléments par tuile incorrect :", options[1])
+                sys.exit(1)
+            print("Découpage du calque en tuiles de", nbMaxTile, "éléments au plus")
+
+        if options[0] in ("-g", "--cluster"):
+            try:
+                nbLevelsCluster = int(options[1])
+                if not 1 <= nbLevelsCluster <= _NB_LEVELS_CLUSTER_MAX_:
+                    raise ValueError(options[1])
+            except ValueError:
+                print("Nombre de niveaux de regroupement incorrect (1 à",
+                      str(_NB_LEVELS_CLUSTER_MAX_) + ") :", options[1])
+                sys.exit(1)
+            print("Regroupement des éléments proches sur", nbLevelsCluster, "niveaux")
+
+        if options[0] in ("-m", "--merge"):
+            try:
+                distanceMerge = float(options[1])
+                if distanceMerge <= 0.:
+                    raise ValueError(options[1])
+            except ValueError:
+                print("Distance de fusion incorrecte :", options[1])
+                sys.exit(1)
+            print("Fusion des fichiers, doublons à moins de", distanceMerge, "m")
+
+        if options[0] in ("-r", "--report"):
+            isCollapse = False
+            print("Doublons listés sans être retirés")
+
+        if options[0] in ("-f", "--formats"):
+            listFormats = [nameFormat.strip().lower() for nameFormat in options[1].split(",")]
+            if not listFormats or not set(listFormats) <= set(FORMATS_OUTPUT):
+                print("Formats incorrects :", options[1], ": valeurs possibles :",
+                      ", ".join(FORMATS_OUTPUT))
+                sys.exit(1)
+            listFormats = list(dict.fromkeys(listFormats))
+            print("Ecriture des formats :", ", ".join(listFormats))
+
+        if options[0] in ("-d", "--description"):
+            try:
+                with open(options[1], 'r', encoding='utf-8') as hTemplateFile:
+                    templateText = hTemplateFile.read()
+            except OSError as exc:
+                print("Modèle de description illisible :", str(exc))
+                sys.exit(1)
+            print("Modèle de description :", options[1])
+
+        if options[0] in ("-b", "--batch"):
+            isBatch = True
+            print("Conversion de plusieurs fichiers")
+
+        if options[0] in ("-j", "--jobs"):
+            try:
+                nbProcess = int(options[1])
+                if nbProcess < 1:
+                    raise ValueError(options[1])
+            except ValueError:
+                print("Nombre de processus incorrect :", options[1])
+                sys.exit(1)
+
+        if options[0] in ("-t", "--title"):
+            titleBatch = options[1]
+
+        if options[0] in ("-p", "--picto"):
+            URLPictoBatch = options[1]
+
+        if options[0] == "--profile":
+            pathProfile = options[1]
+            _PROFILER_.isEnabled = True
+            print("Mesure des étapes, rapport :", pathProfile)
+
+        if options[0] == "--cprofile":
+            pathCProfile = options[1]
+            print("Profilage cProfile, fichier :", pathCProfile)
+
+        if options[0] == "--memory":
+            _PROFILER_.isMemory = True
+            print("Mesure de la mémoire de chaque étape")
+
+        if options[0] == "--memory-max":
+            try:
+                memoryMax = float(options[1])
+                if memoryMax <= 0.:
+                    raise ValueError(options[1])
+            except ValueError:
+                print("Mémoire maximale incorrecte :", options[1])
+                sys.exit(1)
+            _PROFILER_.memoryMax = int(memoryMax * 1024 * 1024)
+            print("Conversion arrêtée au-delà de", memoryMax, "Mo")
+
+        if options[0] == "--server":
+            isServer = True
+
+        if options[0] == "--reuse":
+            pathKMLReuse = options[1]
+            print("Reprise des lignes inchangées de :", pathKMLReuse)
+
+        if options[0] == "--port":
+            try:
+                portServer = int(options[1])
+                if not 0 < portServer < 65536:
+                    raise ValueError(options[1])
+            except ValueError:
+                print("Port du serveur incorrect :", options[1])
+                sys.exit(1)
+
+    profiler = None
+    if pathCProfile is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if pathKMLReuse is not None and (not isIncremental or isServer or isBatch or
+                                     distanceMerge > 0.):
+        print("Option --reuse utilisable seulement avec -u pour un seul fichier")
+        sys.exit(1)
+
+    if isServer:
+        if len(args) != 0:
+            print(__doc__)
+            print("Aucun paramètre en mode --server : les fichiers sont envoyés par le client")
+            sys.exit(1)
+        defaultParams = getFileParams(canUseXLS, "", titleBatch, URLPictoBatch, includePicto,
+                                      isVerbose, isStreaming, useSimplekml, isIncremental,
+                                      isKMZ, nbMaxTile, nbLevelsCluster, listFormats,
+                                      templateText)
+        defaultParams['titleKML'] = titleBatch
+        # Picto du serveur téléchargé une seule fois, lu ensuite dans le cache
+        # ou transmis avec les paramètres de chaque conversion
+        defaultParams.update(prefetchPicto(URLPictoBatch, includePicto, isVerbose))
+        serveConversions(portServer, nbProcess, defaultParams)
+
+    elif len(args) < 1:
         if canUseGUI:
             import tkinter
             print("Lancement de l'IHM...")
@@ -164,49 +529,561 @@ def main(argv=None):
             print("Utilisez le mode batch et passez le fichier à traiter au programme")
             sys.exit(2)
 
+    elif distanceMerge > 0.:
+        if len(args) < 2:
+            print(__doc__)
+            print("Nombre de paramètre invalide : fichier résultat et fichiers à fusionner")
+            sys.exit(1)
+        listPathFicTable = listTableFiles(args[1:])
+        if len(listPathFicTable) == 0:
+            print("Aucun fichier table trouvé dans :", " ".join(args[1:]))
+            sys.exit(1)
+        titleMerge = titleBatch or os.path.splitext(os.path.basename(args[0]))[0]
+        mergeFiles(canUseXLS, listPathFicTable, args[0], titleMerge, URLPictoBatch,
+                   includePicto, isVerbose, distanceMerge, isCollapse, isKMZ, templateText)
+
+    elif isBatch:
+        listPathFicTable = listTableFiles(args)
+        if len(listPathFicTable) == 0:
+            print("Aucun fichier table trouvé dans :", " ".join(args))
+            sys.exit(1)
+        listResults = processFiles(canUseXLS, listPathFicTable, titleBatch, URLPictoBatch,
+                                   includePicto, isVerbose, isStreaming, useSimplekml,
+                                   nbProcess, isIncremental, isKMZ, nbMaxTile,
+                                   nbLevelsCluster, listFormats, templateText)
+        print("Bilan des conversions :")
+        nbErrors = 0
+        for result in listResults:
+            _PROFILER_.listStages.extend(result.get('stages', []))
+            if result['isOK']:
+                print("OK     :", result['pathFicTable'], ":",
+                      result['nbElements'], "éléments,", result['nbMessages'], "lignes ignorées")
+            else:
+                nbErrors += 1
+                print("ERREUR :", result['pathFicTable'], ":", result['error'])
+        print(len(listResults) - nbErrors, "fichiers convertis,", nbErrors, "en erreur.")
+        writeProfiles(pathProfile, profiler, pathCProfile, NOM_PROG, VERSION)
+        print('End table2kml.py', VERSION)
+        sys.exit(3 if nbErrors > 0 else 0)
+
     else: # Batch
         if len(args) >= 2 and len(args) <= 3:
             URLPicto = ""
             if len(args) == 3:
                 URLPicto = args[2]
-            processFile(canUseXLS, args[0], args[1], URLPicto, includePicto, isVerbose)
+            try:
+                processFile(canUseXLS, args[0], args[1], URLPicto, includePicto, isVerbose,
+                            isStreaming, useSimplekml, nbProcess or 1, isIncremental, isKMZ,
+                            nbMaxTile, nbLevelsCluster, listFormats, templateText,
+                            pathKMLReuse=pathKMLReuse)
+            except ValueError as exc:
+                print("Erreur :", str(exc))
+                sys.exit(1)
         else:
             print(__doc__)
             print("Nombre de paramètre invalide : 2 nécessaires et 1 facultatif :")
             print("fichier titre [URLpicto]")
             sys.exit(1)
 
+    writeProfiles(pathProfile, profiler, pathCProfile, NOM_PROG, VERSION)
     print('End table2kml.py', VERSION)
     sys.exit(0)
 
-def processFile(canUseXLS, pathFicTable, titleKML, URLPicto, includePicto, isVerbose):
-    """ Convertit un fichier passé en paramètre en un fichier KML """
-    listInfoRead = []
-    titleRow = []
-    rowData = []
+def writeProfiles(pathProfile, profiler, pathCProfile, nomProg, version):
+    """ Ecrit le rapport JSON des étapes (--profile) et
+        le fichier de statistiques cProfile (--cprofile) demandés """
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(pathCProfile)
+        print("Statistiques cProfile écrites :", pathCProfile,
+              ": lire avec python3 -m pstats", pathCProfile)
+    if pathProfile is not None:
+        _PROFILER_.writeReport(pathProfile, nomProg, version)
+
+def listTableFiles(listArgs):
+    """ Retourne la liste des fichiers à convertir désignés par listArgs :
+        chemins de fichiers, de répertoires ou motifs (*, ?, [...])
+        Les fichiers CSV écrits par une conversion précédente (-f csv, -m) ne sont
+        retenus que s'ils sont désignés explicitement """
+    listPathFicTable = []
+    for arg in listArgs:
+        if os.path.isdir(arg):
+            listPathDir = sorted(os.path.join(arg, name) for name in os.listdir(arg))
+            listPathFicTable.extend(path for path in listPathDir
+                                    if os.path.isfile(path) and isTableFile(path))
+        elif glob.has_magic(arg):
+            listPathFicTable.extend(path for path in sorted(glob.glob(arg))
+                                    if isTableFile(path))
+        else:
+            listPathFicTable.append(arg)
+
+    # Un fichier désigné plusieurs fois n'est converti qu'une fois
+    return list(dict.fromkeys(listPathFicTable))
+
+def isTableFile(pathFile):
+    """ Retourne True si pathFile est une table à convertir en mode -b :
+        extension de EXT_TABLES, hors fichiers CSV écrits par table2kml """
+    return pathFile.endswith(EXT_TABLES) and \
+           not pathFile.endswith((SUFFIX_NORMALISE, SUFFIX_DOUBLONS))
+
+def processFiles(canUseXLS, listPathFicTable, titleKML, URLPicto, includePicto, isVerbose,
+                 isStreaming=False, useSimplekml=False, nbProcess=None, isIncremental=False,
+                 isKMZ=False, nbMaxTile=0, nbLevelsCluster=0, listFormats=None,
+                 templateText=None):
+    """ Convertit plusieurs fichiers en répartissant les conversions sur nbProcess processus
+        titleKML : titre commun des calques, si None le nom du fichier sans extension
+        Retourne un bilan par fichier, dans l'ordre de listPathFicTable """
+    listParams = [getFileParams(canUseXLS, pathFicTable, titleKML, URLPicto, includePicto,
+                                isVerbose, isStreaming, useSimplekml, isIncremental, isKMZ,
+                                nbMaxTile, nbLevelsCluster, listFormats, templateText)
+                  for pathFicTable in listPathFicTable]
+
+    # Picto téléchargé une seule fois : les processus de conversion le lisent dans le cache
+    # ou le reçoivent avec leurs paramètres
+    paramsPicto = prefetchPicto(URLPicto, includePicto, isVerbose)
+    for params in listParams:
+        params.update(paramsPicto)
+
+    if nbProcess is None:
+        nbProcess = os.cpu_count() or 1
+    nbProcess = min(nbProcess, len(listParams))
+    print("Conversion de", len(listParams), "fichiers sur", nbProcess, "processus...")
+    if nbProcess <= 1:
+        return [processFileReport(params) for params in listParams]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nbProcess) as executor:
+        return list(executor.map(processFileReport, listParams))
+
+def getFileParams(canUseXLS, pathFicTable, titleKML, URLPicto, includePicto, isVerbose,
+                  isStreaming=False, useSimplekml=False, isIncremental=False, isKMZ=False,
+                  nbMaxTile=0, nbLevelsCluster=0, listFormats=None, templateText=None):
+    """ Retourne le dictionnaire des paramètres de processFile pour convertir pathFicTable
+        dans un processus de conversion avec processFileReport
+        titleKML : titre du calque, si None le nom du fichier sans extension """
+    if titleKML is None:
+        titleKML = os.path.splitext(os.path.basename(pathFicTable))[0]
+    params = {'canUseXLS':canUseXLS, 'pathFicTable':pathFicTable,
+              'titleKML':titleKML, 'URLPicto':URLPicto,
+              'includePicto':includePicto, 'isVerbose':isVerbose,
+              'isStreaming':isStreaming, 'useSimplekml':useSimplekml,
+              'isIncremental':isIncremental, 'isKMZ':isKMZ,
+              'nbMaxTile':nbMaxTile, 'nbLevelsCluster':nbLevelsCluster,
+              'listFormats':listFormats, 'templateText':templateText}
+    if _PROFILER_.isEnabled or _PROFILER_.isMemory or _PROFILER_.memoryMax > 0:
+        params['profilerConfig'] = _PROFILER_.getConfig()
+    return params
+
+def prefetchPicto(URLPicto, includePicto, isVerbose):
+    """ Télécharge une seule fois le picto inclus désigné par une URL
+        Retourne les paramètres de processFileReport qui le transmettent
+        aux processus de conversion :
+        - isPictoOffline : True si le picto est lu dans le cache disque sans accès réseau
+        - pictoContent : contenu du picto téléchargé mais non enregistré dans le cache """
+    params = {'isPictoOffline':_PICTO_CACHE_.isOffline}
+    if includePicto and URLPicto.startswith("http") and not _PICTO_CACHE_.isOffline:
+        try:
+            content = _PICTO_CACHE_.getURL(URLPicto, isVerbose)
+            if URLPicto in _PICTO_CACHE_.setURLCached:
+                params['isPictoOffline'] = True
+            else:
+                params['pictoContent'] = {URLPicto:content}
+        except OSError as exc:
+            print("Erreur téléchargement picto :", str(exc))
+    return params
+
+def processFileReport(params):
+    """ Convertit un fichier pour processFiles, dans un processus de conversion
+        params : dictionnaire des paramètres de processFile
+        Retourne un bilan de la conversion, sans les éléments lus """
+    params = dict(params)
+    pathFicTable = params['pathFicTable']
+    _PICTO_CACHE_.isOffline = params.pop('isPictoOffline', _PICTO_CACHE_.isOffline)
+    _PICTO_CACHE_.memoContent.update(params.pop('pictoContent', {}))
+    _PROFILER_.setConfig(params.pop('profilerConfig', _PROFILER_.getConfig()))
+    # Etapes mesurées pour ce fichier, rendues au processus principal avec le bilan
+    indexStage = len(_PROFILER_.listStages)
+    try:
+        listMessage, listInfoRead = processFile(**params)
+        nbElements = listInfoRead if isinstance(listInfoRead, int) else len(listInfoRead)
+        result = {'pathFicTable':pathFicTable, 'isOK':True, 'error':"",
+                  'nbElements':nbElements, 'nbMessages':len(listMessage)}
+    except Exception as exc: # pylint: disable=W0703
+        result = {'pathFicTable':pathFicTable, 'isOK':False, 'error':str(exc),
+                  'nbElements':0, 'nbMessages':0}
+    result['stages'] = _PROFILER_.listStages[indexStage:]
+    del _PROFILER_.listStages[indexStage:]
+    return result
+
+def serveConversions(port, nbProcess, defaultParams):
+    """ Serveur de conversion : attend sur http://127.0.0.1:port/conversion
+        des requêtes POST dont le corps JSON décrit un fichier à convertir :
+        {"pathFicTable": chemin absolu, "titleKML": titre (facultatif),
+         "URLPicto": picto (facultatif)}
+        et répond par le bilan JSON de processFileReport quand le fichier est converti.
+        Les conversions sont réparties sur nbProcess processus lancés une seule fois,
+        modules déjà importés ; au-delà de _NB_JOBS_WAITING_ conversions en attente
+        par processus, la requête est refusée (code 503).
+        defaultParams : paramètres de getFileParams communs à toutes les conversions,
+            titleKML None : nom du fichier sans extension,
+            isPictoOffline : le picto URLPicto est lu dans le cache, sans accès réseau,
+            pictoContent : contenu du picto URLPicto non enregistré dans le cache
+        Le serveur s'arrête par Ctrl-C. """
+    import http.server
+
+    if nbProcess is None:
+        nbProcess = os.cpu_count() or 1
+    semaphoreJobs = threading.BoundedSemaphore(nbProcess * (_NB_JOBS_WAITING_ + 1))
+    isVerbose = defaultParams['isVerbose']
+
+    class ConversionHandler(http.server.BaseHTTPRequestHandler):
+        """ Traite une requête de conversion dans un thread du serveur """
+        def do_POST(self): # pylint: disable=C0103
+            """ Convertit le fichier décrit par la requête """
+            if self.path != "/conversion":
+                self.sendJSON(404, {'isOK':False, 'error':"Chemin inconnu : " + self.path})
+                return
+            try:
+                job = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                pathFicTable = job['pathFicTable']
+                for key in ('pathFicTable', 'titleKML', 'URLPicto'):
+                    if key in job and not isinstance(job[key], str):
+                        raise TypeError(key + " doit être une chaîne : " + repr(job[key]))
+            except (ValueError, KeyError, TypeError) as exc:
+                self.sendJSON(400, {'isOK':False, 'error':"Requête invalide : " + str(exc)})
+                return
+            if not semaphoreJobs.acquire(blocking=False):
+                self.sendJSON(503, {'pathFicTable':pathFicTable, 'isOK':False,
+                                    'error':"Serveur saturé : trop de conversions en attente"})
+                return
+            try:
+                params = dict(defaultParams, pathFicTable=pathFicTable,
+                              titleKML=(job.get('titleKML') or defaultParams['titleKML'] or
+                                        os.path.splitext(os.path.basename(pathFicTable))[0]),
+                              URLPicto=job.get('URLPicto', defaultParams['URLPicto']))
+                # Seul le picto du serveur est dans le cache : un autre picto est
+                # téléchargé par le processus de conversion, sauf option -o du serveur
+                if params['URLPicto'] != defaultParams['URLPicto']:
+                    params['isPictoOffline'] = _PICTO_CACHE_.isOffline
+                result = executor.submit(processFileReport, params).result()
+            finally:
+                semaphoreJobs.release()
+            self.sendJSON(200, result)
+
+        def sendJSON(self, code, content):
+            """ Envoie la réponse JSON """
+            body = json.dumps(content, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args): # pylint: disable=W0622
+            """ Trace des requêtes en mode bavard seulement """
+            if isVerbose:
+                super().log_message(format, *args)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nbProcess,
+                                                initializer=warmUpWorker) as executor:
+        # Processus de conversion lancés dès le démarrage du serveur
+        concurrent.futures.wait([executor.submit(time.sleep, 0.1) for _ in range(nbProcess)])
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", port), ConversionHandler)
+        server.daemon_threads = True
+        print("Serveur de conversion sur http://127.0.0.1:" + str(port) + "/conversion,",
+              nbProcess, "processus, Ctrl-C pour arrêter")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("Arrêt du serveur de conversion")
+        finally:
+            server.server_close()
+
+def warmUpWorker():
+    """ Importe au lancement d'un processus de conversion les modules facultatifs
+        disponibles, pour que les conversions ne paient pas leur import """
+    for nameModule in ("xlrd", "openpyxl", "pyarrow.parquet", "numpy", "simplekml"):
+        if importlib.util.find_spec(nameModule.split(".")[0]) is not None:
+            importlib.import_module(nameModule)
+
+def processFile(canUseXLS, pathFicTable, titleKML, URLPicto, includePicto, isVerbose,
+                isStreaming=False, useSimplekml=False, nbProcessFormat=1, isIncremental=False,
+                isKMZ=False, nbMaxTile=0, nbLevelsCluster=0, listFormats=None,
+                templateText=None, progressCallback=None, pathKMLReuse=None):
+    """ Convertit un fichier passé en paramètre en un fichier KML
+        isStreaming : les lignes circulent une à une du lecteur vers le fichier KML
+                      sans être conservées : le nombre d'éléments écrits
+                      est alors retourné à la place de listInfoRead
+        useSimplekml : écriture du KML avec le module simplekml
+        nbProcessFormat : nombre de processus se partageant le formatage des lignes
+        isIncremental : seules les lignes nouvelles ou modifiées depuis la conversion
+                        précédente vers le même fichier KML sont formatées,
+                        retourne comme isStreaming le nombre d'éléments écrits
+        pathKMLReuse : avec isIncremental, fichier KML d'une conversion précédente
+            dont le fichier annexe fournit les lignes inchangées, None pour le fichier
+            KML produit
+        isKMZ : écrit une archive KMZ compressée à la place du fichier KML
+        nbMaxTile : si non nul, découpe le calque en tuiles de nbMaxTile éléments au plus
+        nbLevelsCluster : si non nul, regroupe les éléments proches sur nbLevelsCluster
+            niveaux de zoom
+        listFormats : si non None, liste des formats de FORMATS_OUTPUT à écrire
+            à partir des éléments lus une seule fois
+        templateText : modèle de la bulle d'info (voir DescriptionTemplate),
+            None pour le modèle par défaut
+        progressCallback : si non None, fonction appelée avec le nombre de lignes lues
+            à chaque paquet de lignes, elle peut interrompre la conversion
+            en levant une exception """
     neededColumns = ['Nom', 'Lat', 'Lon']
+    # Options vérifiées avant l'ouverture de la table : pas de fichier laissé ouvert
+    if nbMaxTile > 0 and (isStreaming or isIncremental or isKMZ or useSimplekml):
+        raise ValueError("Découpage en tuiles incompatible avec les options -s, -u, -z et -k")
+    if nbLevelsCluster > 0 and (isStreaming or isIncremental or useSimplekml or nbMaxTile > 0):
+        raise ValueError("Regroupement incompatible avec les options -s, -u, -k et -q")
+    if listFormats and (isStreaming or isIncremental or useSimplekml or isKMZ or
+                        nbMaxTile > 0 or nbLevelsCluster > 0):
+        raise ValueError("Option -f incompatible avec les options -s, -u, -k, -z, -q et -g")
+    if isIncremental and useSimplekml:
+        raise ValueError("Mode incrémental incompatible avec l'écriture par simplekml")
+
+    with _PROFILER_.stage("ouverture", pathFicTable) as infoStage:
+        titleRow, rowIter, pathKMLFile = openTableFile(canUseXLS, pathFicTable, isVerbose)
+        infoStage['nbBytes'] = os.path.getsize(pathFicTable)
+    if progressCallback is not None:
+        rowIter = iterProgress(rowIter, progressCallback)
+    if isKMZ:
+        pathKMLFile = pathKMLFile[:-len(".kml")] + ".kmz"
+
+    if isIncremental:
+        listMessage = []
+        with _PROFILER_.stage("conversion incrémentale", pathKMLFile) as infoStage:
+            nbElements = genKMLFileIncremental(titleRow, rowIter, neededColumns, listMessage,
+                                               titleKML, URLPicto, pathKMLFile, includePicto,
+                                               isVerbose, isKMZ, templateText,
+                                               pathKMLReuse)
+            infoStage['nbRows'] = nbElements
+            infoStage['nbBytes'] = os.path.getsize(pathKMLFile)
+        printFormatReport(nbElements, listMessage, isVerbose)
+        return listMessage, nbElements
+
+    if isStreaming:
+        if isVerbose:
+            print("Mode flux : les lignes ne sont pas conservées en mémoire")
+        listMessage = []
+        elementIter = iterFormatData(titleRow, rowIter, neededColumns, listMessage, isVerbose,
+                                     nbProcessFormat, templateText)
+        # Lecture, formatage et écriture sont entrelacés : une seule étape
+        with _PROFILER_.stage("conversion flux", pathKMLFile) as infoStage:
+            nbElements = genKMLFiles(elementIter, titleKML, URLPicto, pathKMLFile,
+                                     includePicto, isVerbose, useSimplekml, isKMZ)
+            infoStage['nbRows'] = nbElements
+            infoStage['nbBytes'] = os.path.getsize(pathKMLFile)
+        printFormatReport(nbElements, listMessage, isVerbose)
+        return listMessage, nbElements
+
+    if _PROFILER_.isEnabled or _PROFILER_.isMemory:
+        # Lignes lues avant le formatage pour mesurer séparément les deux étapes
+        with _PROFILER_.stage("lecture", pathFicTable) as infoStage:
+            rowIter = list(itertools.chain.from_iterable(iterChunks(rowIter, _SIZE_CHUNK_)))
+            infoStage['nbRows'] = len(rowIter)
+            _PROFILER_.measureData(infoStage, rowIter)
+    with _PROFILER_.stage("formatage", pathFicTable) as infoStage:
+        listMessage, listInfoRead = formatData(titleRow, rowIter, neededColumns, isVerbose,
+                                               nbProcessFormat, templateText)
+        infoStage['nbRows'] = len(listInfoRead)
+        _PROFILER_.measureData(infoStage, listInfoRead)
+    with _PROFILER_.stage("écriture", pathKMLFile) as infoStage:
+        if listFormats:
+            genOutputFiles(listInfoRead, listFormats, titleKML, URLPicto, pathKMLFile,
+                           includePicto, isVerbose)
+        elif nbLevelsCluster > 0:
+            genKMLClusters(listInfoRead, titleKML, URLPicto, pathKMLFile, includePicto,
+                           isVerbose, nbLevelsCluster, isKMZ)
+        elif nbMaxTile > 0:
+            genKMLTiles(listInfoRead, titleKML, URLPicto, pathKMLFile, includePicto, isVerbose,
+                        nbMaxTile)
+        else:
+            genKMLFiles(listInfoRead, titleKML, URLPicto, pathKMLFile, includePicto, isVerbose,
+                        useSimplekml, isKMZ)
+        infoStage['nbRows'] = len(listInfoRead)
+        if os.path.isfile(pathKMLFile):
+            infoStage['nbBytes'] = os.path.getsize(pathKMLFile)
+    return listMessage, listInfoRead
+
+def openTableFile(canUseXLS, pathFicTable, isVerbose):
+    """ Ouvre le fichier table selon son extension
+        Retourne la ligne de titre, un itérateur sur les lignes de données
+        et le chemin du fichier KML correspondant """
+    titleRow = []
+    rowIter = None
     pathKMLFile = ""
     if canUseXLS and pathFicTable.endswith(".xls"):
-        titleRow, rowData = readExcel(pathFicTable, isVerbose)
+        titleRow, rowIter = iterExcel(pathFicTable, isVerbose)
         pathKMLFile = pathFicTable.replace(".xls", ".kml")
+    elif pathFicTable.endswith(".xlsx"):
+        titleRow, rowIter = iterExcelXlsx(pathFicTable, isVerbose)
+        pathKMLFile = pathFicTable[:-len(".xlsx")] + ".kml"
+    elif pathFicTable.endswith((".parquet", ".arrow")):
+        titleRow, rowIter = iterArrow(pathFicTable, isVerbose)
+        pathKMLFile = os.path.splitext(pathFicTable)[0] + ".kml"
     elif pathFicTable.endswith(".csv"):
-        titleRow, rowData = readCSV(pathFicTable, isVerbose)
+        titleRow, rowIter = iterCSV(pathFicTable, isVerbose)
         pathKMLFile = pathFicTable.replace(".csv", ".kml")
     else:
         raise ValueError("Extension du fichier non supporté :" +
                           os.path.basename(pathFicTable) +
-                          " extension supportées : .xls")
-
-    listMessage, listInfoRead = formatData(titleRow, rowData, neededColumns, isVerbose)
-    genKMLFiles(listInfoRead, titleKML, URLPicto, pathKMLFile, includePicto, isVerbose)
-    return listMessage, listInfoRead
+                          " extension supportées : " + ", ".join(EXT_TABLES))
+    return titleRow, rowIter, pathKMLFile
+
+def mergeFiles(canUseXLS, listPathFicTable, pathMergedFile, titleKML, URLPicto, includePicto,
+               isVerbose, distanceMax, isCollapse=True, isKMZ=False, templateText=None):
+    """ Fusionne les éléments de plusieurs fichiers table dans un seul calque
+        Les éléments de sources différentes distants de moins de distanceMax mètres
+        et de noms voisins sont des doublons : ils sont listés dans le fichier
+        <pathMergedFile>_doublons.csv et, si isCollapse, seul le premier est conservé.
+        Retourne la liste des éléments fusionnés et celle des doublons """
+    neededColumns = ['Nom', 'Lat', 'Lon']
+    if not pathMergedFile.endswith(".kml"):
+        raise ValueError("Nom du fichier fusionné incorrect : " +
+                         os.path.basename(pathMergedFile) +
+                         " : devrait finir par l'extension .kml")
+    pathReport = pathMergedFile[:-len(".kml")] + SUFFIX_DOUBLONS
+    if isKMZ:
+        pathMergedFile = pathMergedFile[:-len(".kml")] + ".kmz"
+
+    listSources = []
+    for pathFicTable in listPathFicTable:
+        titleRow, rowIter, _ = openTableFile(canUseXLS, pathFicTable, isVerbose)
+        listInfoRead = formatData(titleRow, rowIter, neededColumns, isVerbose,
+                                  templateText=templateText)[1]
+        listSources.append((os.path.basename(pathFicTable), listInfoRead))
+
+    listInfoMerged, listDuplicates = findDuplicates(listSources, distanceMax, isCollapse)
+    print(len(listDuplicates), "doublons trouvés, liste dans", pathReport)
+    with open(pathReport, 'w', encoding='utf-8', newline='') as hReport:
+        writer = csv.writer(hReport, delimiter=',', quoting=csv.QUOTE_ALL)
+        writer.writerow(["Source", "Nom", "Commune", "Source doublon", "Nom doublon",
+                         "Commune doublon", "Distance (m)", "Similarité nom"])
+        for duplicate in listDuplicates:
+            element, other = duplicate['element'], duplicate['doublon']
+            writer.writerow([element['source'], element['nom'], element['Commune'],
+                             other['source'], other['nom'], other['Commune'],
+                             str(round(duplicate['distance'])),
+                             str(round(duplicate['similarite'], 2))])
+
+    genKMLFiles(listInfoMerged, titleKML, URLPicto, pathMergedFile, includePicto, isVerbose,
+                False, isKMZ)
+    return listInfoMerged, listDuplicates
+
+def findDuplicates(listSources, distanceMax, isCollapse):
+    """ Recherche les doublons entre sources
+        listSources : liste de (nom source, liste des éléments formatés)
+        Un élément est comparé aux seuls éléments des sources précédentes
+        situés dans les cases voisines d'une grille de côté distanceMax :
+        le coût est proportionnel au nombre d'éléments et non à son carré.
+        Retourne la liste des éléments fusionnés et celle des doublons """
+    listAllElements = [element for _, listInfoRead in listSources for element in listInfoRead]
+    if not listAllElements:
+        return [], []
+    latitudeMax = max(abs(element['latitude']) for element in listAllElements)
+    gridIndex = GridIndex(distanceMax, latitudeMax)
+
+    listInfoMerged = []
+    listDuplicates = []
+    for source, listInfoRead in listSources:
+        listNewEntries = []
+        for element in listInfoRead:
+            element['source'] = source
+            nameNorm = normalizeName(element['nom'])
+            bestMatch = None
+            for other, otherNameNorm in gridIndex.iterNear(element['latitude'],
+                                                           element['longitude']):
+                distance = gridIndex.getDistance(element, other)
+                if distance > distanceMax:
+                    continue
+                similarity = getSimilarity(nameNorm, otherNameNorm)
+                if similarity >= _SIMILARITY_NAME_MIN_ and \
+                   (bestMatch is None or similarity > bestMatch['similarite']):
+                    bestMatch = {'element':other, 'doublon':element,
+                                 'distance':distance, 'similarite':similarity}
+            if bestMatch is not None:
+                listDuplicates.append(bestMatch)
+                if isCollapse:
+                    other = bestMatch['element']
+                    other['description'] += ("<b>Doublon</b> : " + element['nom'] +
+                                             " (" + source + ")<br/>\n")
+                    continue
+            listInfoMerged.append(element)
+            listNewEntries.append((element, nameNorm))
+        # Indexé après la source : pas de comparaison entre éléments d'une même source
+        for element, nameNorm in listNewEntries:
+            gridIndex.add(element, nameNorm)
+    return listInfoMerged, listDuplicates
+
+def normalizeName(name):
+    """ Retourne le nom sans accent, ponctuation ni majuscule pour la comparaison """
+    name = unicodedata.normalize('NFKD', name.lower())
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    return " ".join(__REGEXP_NOT_ALNUM__.sub(" ", name).split())
+
+def getSimilarity(nameNorm1, nameNorm2):
+    """ Retourne la similarité entre 0 et 1 de deux noms normalisés """
+    matcher = difflib.SequenceMatcher(None, nameNorm1, nameNorm2)
+    if matcher.real_quick_ratio() < _SIMILARITY_NAME_MIN_ or \
+       matcher.quick_ratio() < _SIMILARITY_NAME_MIN_:
+        return 0.
+    return matcher.ratio()
+
+class GridIndex():
+    """ Index spatial des éléments sur une grille de cases de côté distanceMax :
+        les éléments à moins de distanceMax d'un point
+        sont dans sa case ou dans les 8 cases voisines """
+    RAYON_TERRE = 6371000.
+
+    def __init__(self, distanceMax, latitudeMax):
+        """
+        parameters :
+            - distanceMax : côté des cases en mètres
+            - latitudeMax : plus grande latitude (valeur absolue) des éléments indexés,
+                            pour que les cases fassent au moins distanceMax de large
+        """
+        self.sizeLat = math.degrees(distanceMax / self.RAYON_TERRE)
+        self.sizeLon = self.sizeLat / max(math.cos(math.radians(latitudeMax)), 0.01)
+        self.dictCells = {}
+
+    def getCell(self, latitude, longitude):
+        """ Retourne la case contenant le point """
+        return math.floor(latitude / self.sizeLat), math.floor(longitude / self.sizeLon)
+
+    def add(self, element, nameNorm):
+        """ Indexe l'élément et son nom normalisé """
+        cell = self.getCell(element['latitude'], element['longitude'])
+        self.dictCells.setdefault(cell, []).append((element, nameNorm))
+
+    def iterNear(self, latitude, longitude):
+        """ Itère sur les (élément, nom normalisé) des 9 cases autour du point """
+        iLat, iLon = self.getCell(latitude, longitude)
+        for deltaLat in (-1, 0, 1):
+            for deltaLon in (-1, 0, 1):
+                yield from self.dictCells.get((iLat + deltaLat, iLon + deltaLon), ())
+
+    @classmethod
+    def getDistance(cls, element1, element2):
+        """ Retourne la distance en mètres entre deux éléments proches
+            (approximation équirectangulaire) """
+        latitudeMean = math.radians((element1['latitude'] + element2['latitude']) / 2.)
+        deltaX = math.radians(element2['longitude'] - element1['longitude']) * \
+                 math.cos(latitudeMean)
+        deltaY = math.radians(element2['latitude'] - element1['latitude'])
+        return cls.RAYON_TERRE * math.hypot(deltaX, deltaY)
 
 def readExcel(pathFicTable, isVerbose):
     """ Recupère les infos de localisation dans le fichier Excel"""
+    titleRow, rowIter = iterExcel(pathFicTable, isVerbose)
+    return titleRow, list(rowIter)
+
+def iterExcel(pathFicTable, isVerbose):
+    """ Ouvre le fichier Excel et retourne la ligne de titre
+        et un itérateur sur les lignes de données (dictionnaires) """
     import xlrd
     EXT_FIC_OK = ".xls"
-    titleRow = []
-    rowData = []
 
     if len(pathFicTable) == 0:
         raise ValueError("Nom fichier vide !" )
@@ -227,27 +1104,254 @@ def readExcel(pathFicTable, isVerbose):
     if isVerbose:
         print("Analyse de la feuille 0  :", sheetData.name)
 
-    # Enregistrement contenu de la table dans la structure rowData
+    # Ligne de titre et liens WEB de la feuille indexés par ligne, lus une seule fois
     titleRow = sheetData.row_values(0)
-    rowData = []
-    for numRow in range(1, sheetData.nrows):
-        rowCols = {}
-        for numCol in range(sheetData.ncols):
-            rowCols[sheetData.cell_value(0, numCol)] = sheetData.cell_value(numRow, numCol)
-            # Extraction des liens WEB
-            link = sheetData.hyperlink_map.get((numRow, numCol))
-            if link is not None:
-                rowCols[sheetData.cell_value(0, numCol)] = link.url_or_path
-        rowData.append(rowCols)
-
-    return titleRow, rowData
+    linksByRow = {}
+    for (numRow, numCol), link in sheetData.hyperlink_map.items():
+        linksByRow.setdefault(numRow, []).append((numCol, link.url_or_path))
+
+    def rowIterator():
+        """ Produit le contenu de la table ligne par ligne """
+        for numRow in range(1, sheetData.nrows):
+            rowValues = sheetData.row_values(numRow)
+            # Le lien WEB remplace le texte de la cellule
+            for numCol, url in linksByRow.get(numRow, ()):
+                rowValues[numCol] = url
+            yield dict(zip(titleRow, rowValues))
+        workbook.release_resources()
+
+    return titleRow, rowIterator()
+
+def iterExcelXlsx(pathFicTable, isVerbose):
+    """ Ouvre le classeur Excel .xlsx en lecture seule et retourne la ligne de titre
+        et un itérateur sur les lignes de données (dictionnaires) de la 1ère feuille
+        Les lignes sont lues au fil de l'itération : le classeur n'est jamais chargé
+        en entier en mémoire """
+    if importlib.util.find_spec("openpyxl") is None:
+        raise ValueError("Module openpyxl non disponible : fichier .xlsx non lisible : " +
+                         os.path.basename(pathFicTable))
+    import openpyxl
+
+    print("Lecture de", pathFicTable, "...")
+    workbook = openpyxl.load_workbook(pathFicTable, read_only=True, data_only=True)
+    if isVerbose:
+        print("Liste des feuilles du classeur :", workbook.sheetnames)
+    sheetData = workbook.worksheets[0]
+    if isVerbose:
+        print("Analyse de la feuille 0  :", sheetData.title)
+
+    # Le mode lecture seule ignore les liens WEB : ils sont lus à part
+    linksByRow = readXlsxHyperlinks(pathFicTable, sheetData.title)
+
+    # Lignes numérotées à partir de 0 comme avec xlrd, lignes vides comprises
+    rowIter = sheetData.iter_rows(min_row=1, min_col=1, values_only=True)
+    titleRow = [convertXlsxValue(value) for value in next(rowIter, ())]
+
+    def rowIterator():
+        """ Produit le contenu de la table ligne par ligne """
+        for numRow, rowValues in enumerate(rowIter, start=1):
+            rowValues = [convertXlsxValue(value) for value in rowValues[:len(titleRow)]]
+            rowValues.extend([''] * (len(titleRow) - len(rowValues)))
+            # Le lien WEB remplace le texte de la cellule
+            for numCol, url in linksByRow.get(numRow, ()):
+                if numCol < len(titleRow):
+                    rowValues[numCol] = url
+            yield dict(zip(titleRow, rowValues))
+        workbook.close()
+
+    return titleRow, rowIterator()
+
+def convertXlsxValue(value):
+    """ Retourne la valeur d'une cellule .xlsx comme xlrd pour une cellule .xls :
+        texte vide pour une cellule vide, nombre réel pour un nombre """
+    if value is None:
+        return ''
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def readXlsxHyperlinks(pathFicTable, nameSheet):
+    """ Retourne les liens WEB de la feuille nameSheet du classeur .xlsx
+        indexés par ligne : {numéro ligne : [(numéro colonne, url), ...]}
+        numéros à partir de 0. Le XML de la feuille est parcouru sans être conservé """
+    from openpyxl.utils.cell import range_boundaries
+    nsMain = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    nsRel = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+    linksByRow = {}
+    with zipfile.ZipFile(pathFicTable) as archive:
+        # Partie XML de la feuille : xl/workbook.xml et ses relations
+        pathWorkbook = "xl/workbook.xml"
+        dictParts = readXlsxRelationships(archive, pathWorkbook)
+        with archive.open(pathWorkbook) as hWorkbook:
+            for sheet in xml.etree.ElementTree.parse(hWorkbook).getroot().iter(nsMain + 'sheet'):
+                if sheet.get('name') == nameSheet:
+                    pathSheet = dictParts.get(sheet.get(nsRel + 'id'))
+                    break
+            else:
+                pathSheet = None
+        if pathSheet is None or pathSheet not in archive.namelist():
+            raise ValueError("Feuille " + nameSheet + " introuvable dans : " +
+                             os.path.basename(pathFicTable))
+
+        # Cibles des liens externes de la feuille
+        dictTargets = readXlsxRelationships(archive, pathSheet, isExternal=True)
+
+        with archive.open(pathSheet) as hSheet:
+            for _, node in xml.etree.ElementTree.iterparse(hSheet):
+                if node.tag == nsMain + 'hyperlink':
+                    url = dictTargets.get(node.get(nsRel + 'id'), node.get('location'))
+                    if url:
+                        minCol, minRow, maxCol, maxRow = range_boundaries(node.get('ref'))
+                        for numRow in range(minRow - 1, maxRow):
+                            for numCol in range(minCol - 1, maxCol):
+                                linksByRow.setdefault(numRow, []).append((numCol, url))
+                elif node.tag == nsMain + 'row':
+                    node.clear()
+    return linksByRow
+
+def readXlsxRelationships(archive, pathPart, isExternal=False):
+    """ Retourne les relations de la partie pathPart de l'archive .xlsx : {Id : cible}
+        Une cible interne est le chemin de la partie dans l'archive,
+        une cible externe (isExternal) est conservée telle quelle (URL) """
+    nsPackage = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+    pathRels = posixpath.join(posixpath.dirname(pathPart), "_rels",
+                              posixpath.basename(pathPart) + ".rels")
+    dictTargets = {}
+    if pathRels in archive.namelist():
+        with archive.open(pathRels) as hRels:
+            for relation in xml.etree.ElementTree.parse(hRels).getroot():
+                if relation.tag == nsPackage + 'Relationship':
+                    target = relation.get('Target')
+                    if not isExternal:
+                        target = target.lstrip('/') if target.startswith('/') else \
+                                 posixpath.normpath(posixpath.join(posixpath.dirname(pathPart),
+                                                                   target))
+                    dictTargets[relation.get('Id')] = target
+    return dictTargets
+
+def iterArrow(pathFicTable, isVerbose):
+    """ Ouvre le fichier colonnes Parquet (.parquet) ou Arrow (.arrow) et retourne
+        la ligne de titre et un itérateur sur les lignes de données (dictionnaires)
+        Seules les colonnes utiles (titre ne commençant pas par -) sont lues,
+        par paquets de lignes ColumnChunk que iterChunks transmet tels quels
+        au formatage : les colonnes Nom, Lat et Lon y sont lues sans passer par les lignes """
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ValueError("Module pyarrow non disponible : fichier non lisible : " +
+                         os.path.basename(pathFicTable))
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    print("Lecture de", pathFicTable, "...")
+    isParquet = pathFicTable.endswith(".parquet")
+    if isParquet:
+        parquetFile = pyarrow.parquet.ParquetFile(pathFicTable)
+        allColumnNames = parquetFile.schema_arrow.names
+    else:
+        source = pyarrow.memory_map(pathFicTable)
+        reader = pyarrow.ipc.open_file(source)
+        allColumnNames = reader.schema.names
+    titleRow = [name for name in allColumnNames if not name.startswith('-')]
+    if isVerbose:
+        print("Colonnes lues :", titleRow, "sur", len(allColumnNames))
+    canUseNumpy = importlib.util.find_spec("numpy") is not None
+
+    def chunkIterator():
+        """ Produit le contenu de la table par paquets de _SIZE_CHUNK_ lignes au plus """
+        if isParquet:
+            for batch in parquetFile.iter_batches(batch_size=_SIZE_CHUNK_, columns=titleRow):
+                yield ColumnChunk(batch, canUseNumpy)
+            return
+        with source:
+            for numBatch in range(reader.num_record_batches):
+                batch = reader.get_batch(numBatch).select(titleRow)
+                for numRowFirst in range(0, batch.num_rows, _SIZE_CHUNK_):
+                    yield ColumnChunk(batch.slice(numRowFirst, _SIZE_CHUNK_), canUseNumpy)
+
+    return titleRow, ChunkIterator(chunkIterator())
+
+class ColumnChunk():
+    """ Paquet de lignes d'un fichier colonnes (Parquet ou Arrow) :
+        - getColumnCoord : colonne de coordonnées, tableau numpy de réels
+          (NaN si absente) pour une colonne numérique
+        - getColumnText : colonne convertie en textes ('' si absente)
+        - les lignes (dictionnaires de textes) ne sont construites que pour la bulle d'info
+        Les réels sont écrits au plus court : 44.6 et non 44.599998474121094 en float32 """
+    def __init__(self, batch, canUseNumpy):
+        """
+        Constructor
+        parameters :
+            - batch : pyarrow.RecordBatch des colonnes utiles
+            - canUseNumpy : colonnes numériques de coordonnées converties en tableaux numpy
+        """
+        self.batch = batch
+        self.canUseNumpy = canUseNumpy
+        self.columnsText = {}
+
+    def __len__(self):
+        return self.batch.num_rows
+
+    def __getitem__(self, numRow):
+        """ Retourne la ligne numRow du paquet (dictionnaire de textes) """
+        return {name:self.getColumnText(name)[numRow] for name in self.batch.schema.names}
+
+    def __iter__(self):
+        listNames = self.batch.schema.names
+        columns = [self.getColumnText(name) for name in listNames]
+        for rowValues in zip(*columns):
+            yield dict(zip(listNames, rowValues))
+
+    def getColumnText(self, name):
+        """ Retourne la colonne name convertie en textes, conservée pour le paquet """
+        if name not in self.columnsText:
+            import pyarrow
+            column = self.batch.column(name)
+            if pyarrow.types.is_floating(column.type):
+                # Texte au plus court d'Arrow relu en réel Python : 44.6 et 3.0
+                self.columnsText[name] = ['' if text is None else str(float(text))
+                                          for text in column.cast(pyarrow.string()).to_pylist()]
+            else:
+                self.columnsText[name] = ['' if value is None else str(value)
+                                          for value in column.to_pylist()]
+        return self.columnsText[name]
+
+    def getColumnCoord(self, name):
+        """ Retourne la colonne de coordonnées name : tableau numpy de réels pour une colonne
+            numérique si numpy est disponible, textes sinon """
+        import pyarrow
+        column = self.batch.column(name)
+        if not self.canUseNumpy or not (pyarrow.types.is_floating(column.type) or
+                                        pyarrow.types.is_integer(column.type)):
+            return self.getColumnText(name)
+        if column.type != pyarrow.float64():
+            # Passage par le texte au plus court : pas de décimales parasites des float32
+            column = column.cast(pyarrow.string()).cast(pyarrow.float64())
+        return column.to_numpy(zero_copy_only=False)
+
+class ChunkIterator():
+    """ Itérateur sur les lignes d'une table lue par paquets de lignes :
+        iterChunks produit directement les paquets de chunkIter """
+    def __init__(self, chunkIter):
+        self.chunkIter = iter(chunkIter)
+        self.rowIter = itertools.chain.from_iterable(self.chunkIter)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.rowIter)
 
 def readCSV(pathFicTable, isVerbose):
     """ Recupère les infos de localisation dans le fichier Excel"""
-    import csv
+    titleRow, rowIter = iterCSV(pathFicTable, isVerbose)
+    return titleRow, list(rowIter)
+
+def iterCSV(pathFicTable, isVerbose):
+    """ Ouvre le fichier CSV et retourne la ligne de titre
+        et un itérateur sur les lignes de données (dictionnaires).
+        Le fichier est fermé quand l'itérateur est épuisé. """
     EXT_FIC_OK = ".csv"
-    titleRow = []
-    rowData = []
 
     if len(pathFicTable) == 0:
         raise ValueError("Nom fichier vide !")
@@ -259,7 +1363,8 @@ def readCSV(pathFicTable, isVerbose):
 
     print("Lecture de", pathFicTable, "...")
     # Analyse du fichier CSV
-    with open(pathFicTable, newline='', encoding='utf-8') as csvfile:
+    csvfile = open(pathFicTable, newline='', encoding='utf-8')
+    try:
         sample = csvfile.read(1024)
         sniffer = csv.Sniffer()
 
@@ -283,92 +1388,217 @@ def readCSV(pathFicTable, isVerbose):
         # Lecture du fichier dans dictionnaire
         csvfile.seek(0)
         reader = csv.DictReader(csvfile, dialect=dialect)
-
-        # Enregistrement contenu de la table dans la structure rowData
         titleRow = reader.fieldnames
-        for row in reader:
-            rowData.append(row)
-    return titleRow, rowData
+    except:
+        csvfile.close()
+        raise
 
-def formatData(titleRow, rowData, neededColumns, isVerbose):
-    """ Formatage et contrôle des donnees utiles """
-    listInfoRead = []
+    def rowIterator():
+        """ Produit le contenu de la table ligne par ligne """
+        with csvfile:
+            yield from reader
+
+    return titleRow, rowIterator()
+
+def formatData(titleRow, rowData, neededColumns, isVerbose, nbProcess=1, templateText=None):
+    """ Formatage et contrôle des donnees utiles
+        nbProcess : nombre de processus se partageant le formatage
+        templateText : modèle de la bulle d'info, None pour le modèle par défaut """
     listMessage = []
-    regexpSite = re.compile(r'^http[s]?://(?P<siteName>.+?)/.*?(?P<id>[\w=. ]+)$')
+    listInfoRead = list(iterFormatData(titleRow, rowData, neededColumns,
+                                       listMessage, isVerbose, nbProcess, templateText))
+    printFormatReport(len(listInfoRead), listMessage, isVerbose)
+    return listMessage, listInfoRead
 
-    # Détermination colonnes utiles
-    titleRowUsed = checkNeededColumns(titleRow, neededColumns, isVerbose)
+def printFormatReport(nbElements, listMessage, isVerbose):
+    """ Affiche le bilan du formatage des données """
+    if isVerbose:
+        for message in listMessage:
+            print("Ligne numéro", message['numLigne'], message['texte'])
+        # Compteurs de ce processus, cumulés sur ses conversions
+        cacheInfo = formateURL.cache_info()
+        if cacheInfo.hits + cacheInfo.misses > 0:
+            print("Cache des liens HTML :", cacheInfo.hits, "réutilisés,",
+                  cacheInfo.misses, "calculés,", cacheInfo.currsize, "conservés sur",
+                  cacheInfo.maxsize)
+    print(nbElements, "éléments enregistrés,", len(listMessage), "lignes ignorées.")
+
+def iterFormatData(titleRow, rowIter, neededColumns, listMessage, isVerbose, nbProcess=1,
+                   templateText=None):
+    """ Formatage et contrôle des donnees utiles ligne par ligne
+        Produit les éléments valides, les lignes ignorées sont ajoutées à listMessage
+        nbProcess : nombre de processus se partageant le formatage des paquets de lignes,
+                    les éléments sont produits dans l'ordre des lignes
+        templateText : modèle de la bulle d'info, None pour le modèle par défaut """
+    # Détermination colonnes utiles et du modèle, une seule fois pour toutes les lignes
+    rowPlan = checkNeededColumns(titleRow, neededColumns, isVerbose, templateText)
+
+    canUseNumpy = importlib.util.find_spec("numpy") is not None
+    if isVerbose and canUseNumpy:
+        print("Module numpy disponible : conversion des coordonnées par paquets")
+
+    if nbProcess <= 1:
+        numLigneFirst = 1
+        for chunkRows in iterChunks(rowIter, _SIZE_CHUNK_):
+            listElements, listMessageChunk = formatChunk(rowPlan, chunkRows,
+                                                         numLigneFirst, canUseNumpy)
+            numLigneFirst += len(chunkRows)
+            listMessage.extend(listMessageChunk)
+            yield from listElements
+        return
 
-    for numLigne, row in enumerate(rowData):
-        ligneOK = True
-        messageInfos = {'numLigne':numLigne+1}
+    if isVerbose:
+        print("Formatage réparti sur", nbProcess, "processus")
+    # Au plus 2 paquets en attente par processus : la table n'est pas chargée en entier
+    with concurrent.futures.ProcessPoolExecutor(max_workers=nbProcess) as executor:
+        pendingChunks = collections.deque()
+        numLigneFirst = 1
+        for chunkRows in iterChunks(rowIter, _SIZE_CHUNK_):
+            pendingChunks.append(executor.submit(formatChunk, rowPlan, chunkRows,
+                                                 numLigneFirst, canUseNumpy))
+            numLigneFirst += len(chunkRows)
+            if len(pendingChunks) >= 2 * nbProcess:
+                listElements, listMessageChunk = pendingChunks.popleft().result()
+                listMessage.extend(listMessageChunk)
+                yield from listElements
+        while pendingChunks:
+            listElements, listMessageChunk = pendingChunks.popleft().result()
+            listMessage.extend(listMessageChunk)
+            yield from listElements
+
+def formatChunk(rowPlan, chunkRows, numLigneFirst, canUseNumpy):
+    """ Formatage et contrôle d'un paquet de lignes
+        rowPlan : plan de traitement des lignes retourné par checkNeededColumns
+        numLigneFirst : numéro de la première ligne du paquet dans la table
+        Retourne la liste des éléments valides et celle des messages des lignes ignorées """
+    fieldNom = rowPlan['nom']
+    fieldsCoord = rowPlan['coords']
+    fieldCommune = rowPlan['commune']
+    templateDescription = rowPlan['description']
+    listElements = []
+    listMessage = []
 
-        # Check neededColumns[0]
-        fieldName, nomElement = getFirstFieldStartingBy(row, neededColumns[0])
-        if ligneOK and len(nomElement) == 0 :
-            ligneOK = False
-            messageInfos['texte'] = "ignorée car champ " + fieldName + " vide"
+    # Colonnes utiles du paquet, puis conversion de toutes ses coordonnées
+    columnNom = getChunkColumn(chunkRows, fieldNom)
+    columnCommune = getChunkColumn(chunkRows, fieldCommune) if fieldCommune else None
+    columnsValue = [getChunkColumn(chunkRows, fieldName, isCoord=True)
+                    for fieldName in fieldsCoord]
+    columnsCoord = convertCoordChunk(columnsValue, canUseNumpy)
 
-        # Verif et conversion champs Longitude et Latitude
-        coordValue = {}
-        for field in (neededColumns[1], neededColumns[2]):
-            fieldName, value = getFirstFieldStartingBy(row, field)
-            if ligneOK and len(value) == 0 :
-                ligneOK = False
-                messageInfos['texte'] = "ignorée car champ " + fieldName + " vide"
-            if ligneOK:
-                try:
-                    coordValue[fieldName] = convertCoord(value)
-                except ValueError:
-                    ligneOK = False
-                    messageInfos['texte'] = "ignorée car champ " + fieldName + \
-                                            " incorrect : " + value
-
-        # Construction du champ description
-        description = "<h1>Informations</h1>" + '\n'
-        fieldCommune = ""
-        for field in titleRowUsed:
-            # Place name is not written in description info balloon
-            if ligneOK and not field.startswith(neededColumns[0]):
-                value = str(row[field]).strip()
-                if value and value != '?' :
-                    description += "<b>" + field.strip() + "</b> : "
+    for numRowChunk, nomElement in enumerate(columnNom):
+        numLigne = numLigneFirst + numRowChunk
 
-                    # Champs particuliers
-                    if field.startswith('Commune'):
-                        value = 'https://fr.wikipedia.org/wiki/' + value
-                    elif field in (getFirstFieldStartingBy(row, neededColumns[1])[0],
-                                   getFirstFieldStartingBy(row, neededColumns[2])[0]):
-                        # Ecrit dans le champ description les coordonnées converties
-                        value = str(coordValue[field])
+        # Check colonne Nom
+        if len(nomElement) == 0 :
+            listMessage.append({'numLigne':numLigne,
+                                'texte':"ignorée car champ " + fieldNom + " vide"})
+            continue
 
-                    if value.startswith("http"):
-                        value = formateURL(value, regexpSite)
-                    description += value + '<br/>\n'
+        # Verif champs Longitude et Latitude
+        coordValue = {}
+        messageTexte = None
+        for numField, fieldName in enumerate(fieldsCoord):
+            value = columnsValue[numField][numRowChunk]
+            # Valeur vide, ou absente d'une colonne numérique (NaN)
+            if value == '' or value != value:
+                messageTexte = "ignorée car champ " + fieldName + " vide"
+                break
+            coordValue[fieldName] = columnsCoord[numField][numRowChunk]
+            if coordValue[fieldName] is None:
+                messageTexte = "ignorée car champ " + fieldName + " incorrect : " + str(value)
+                break
+        if messageTexte is not None:
+            listMessage.append({'numLigne':numLigne, 'texte':messageTexte})
+            continue
+
+        # Construction du champ description : seule étape lisant la ligne entière
+        description = templateDescription.render(chunkRows[numRowChunk], coordValue)
 
         # Enregistrement des valeurs utiles dans la structure résultat
-        if ligneOK:
-            listInfoRead.append({'numLigne':numLigne+1,
-                'nom':nomElement.strip(),
-                'Commune':fieldCommune,
-                'latitude':coordValue[getFirstFieldStartingBy(row, neededColumns[1])[0]],
-                'longitude':coordValue[getFirstFieldStartingBy(row, neededColumns[2])[0]],
-                'description':description
-                                })
+        listElements.append({'numLigne':numLigne,
+                             'nom':nomElement.strip(),
+                             'Commune':str(columnCommune[numRowChunk]).strip()
+                                       if fieldCommune else "",
+                             'latitude':coordValue[fieldsCoord[0]],
+                             'longitude':coordValue[fieldsCoord[1]],
+                             'description':description
+                            })
+    return listElements, listMessage
+
+def iterChunks(rowIter, sizeChunk):
+    """ Regroupe les lignes de rowIter en listes de sizeChunk lignes au plus
+        Un ChunkIterator fournit directement ses paquets, de sizeChunk lignes au plus """
+    if isinstance(rowIter, ChunkIterator):
+        for chunkRows in rowIter.chunkIter:
+            _PROFILER_.checkMemory()
+            yield chunkRows
+        return
+    rowIter = iter(rowIter)
+    chunkRows = list(itertools.islice(rowIter, sizeChunk))
+    while chunkRows:
+        # Arrêt avant épuisement de la mémoire si --memory-max
+        _PROFILER_.checkMemory()
+        yield chunkRows
+        chunkRows = list(itertools.islice(rowIter, sizeChunk))
+
+def iterProgress(rowIter, progressCallback):
+    """ Retourne un ChunkIterator sur les lignes de rowIter qui appelle progressCallback
+        avec le nombre de lignes lues, une fois par paquet de _SIZE_CHUNK_ lignes
+        et en fin de table """
+    def chunkIterator():
+        """ Produit les paquets de lignes en signalant la progression """
+        nbRows = 0
+        for chunkRows in iterChunks(rowIter, _SIZE_CHUNK_):
+            nbRows += len(chunkRows)
+            progressCallback(nbRows)
+            yield chunkRows
+        progressCallback(nbRows)
+
+    return ChunkIterator(chunkIterator())
+
+def getChunkColumn(chunkRows, fieldName, isCoord=False):
+    """ Retourne les valeurs de la colonne fieldName d'un paquet de lignes
+        isCoord : colonne de coordonnées, numérique pour un paquet ColumnChunk """
+    if isinstance(chunkRows, ColumnChunk):
+        if isCoord:
+            return chunkRows.getColumnCoord(fieldName)
+        return chunkRows.getColumnText(fieldName)
+    return [row[fieldName] for row in chunkRows]
+
+def convertCoordChunk(columnsValue, canUseNumpy):
+    """ Convertit les colonnes de coordonnées d'un paquet de lignes
+        columnsValue : valeurs de chaque colonne, voir getChunkColumn
+        Retourne pour chaque colonne la liste des valeurs réelles,
+        None pour une valeur incorrecte """
+    columnsCoord = []
+    for listCoord in columnsValue:
+        if canUseNumpy:
+            arrayCoord, arrayInvalid = convertCoordColumn(listCoord)
+            columnCoord = [None if isInvalid else coord
+                           for coord, isInvalid in zip(arrayCoord.tolist(),
+                                                       arrayInvalid.tolist())]
         else:
-            listMessage.append(messageInfos)
-
-    if isVerbose:
-        for message in listMessage:
-            print("Ligne numéro", message['numLigne'], message['texte'])
-    print(len(listInfoRead), "éléments enregistrés,", len(listMessage), "lignes ignorées.")
-
-    return listMessage, listInfoRead
+            columnCoord = []
+            for coord in listCoord:
+                try:
+                    columnCoord.append(convertCoord(coord))
+                except ValueError:
+                    columnCoord.append(None)
+        columnsCoord.append(columnCoord)
+    return columnsCoord
 
-def  checkNeededColumns(allColumnNames, neededColumns, isVerbose):
+def  checkNeededColumns(allColumnNames, neededColumns, isVerbose, templateText=None):
     """ Verif présence colonnes obligatoires dans titres
         Suppression colonne commençant par -
-        Retourne la liste des titres et les noms complets des colonnes obligatoires """
+        Retourne le plan de traitement des lignes, calculé une fois pour toute la table :
+        - titleRow : titres des colonnes utilisées
+        - nom : nom complet de la colonne Nom
+        - coords : noms complets des colonnes Lat et Lon
+        - commune : nom de la première colonne commençant par Commune ou None
+        - descColumns : (nom colonne, titre affiché, type) des colonnes de la bulle d'info,
+            type parmi 'commune', 'coord' ou 'texte'
+        - description : DescriptionTemplate de la bulle d'info, compilé à partir de
+            templateText ou du modèle par défaut si templateText est None """
 
     # Elimination des colonnes commençant par -
     titleRow = [title for title in allColumnNames if not title.startswith('-')]
@@ -380,30 +1610,123 @@ def  checkNeededColumns(allColumnNames, neededColumns, isVerbose):
         raise ValueError("Au moins " + str(len(neededColumns)) + " colonnes nécessaires dans :\n" +
                          str(titleRow))
 
+    fullNeededColumns = []
     for startColumn in neededColumns:
-        colFound = False
+        colFound = None
         for colName in titleRow:
             if colName.startswith(startColumn):
-                colFound = True
+                colFound = colName
                 break
-        if not colFound:
+        if colFound is None:
             raise ValueError("Aucune colonne commençant par " + startColumn + " trouvée !")
+        fullNeededColumns.append(colFound)
 
     if isVerbose:
         print("Titres des colonnes obligatoires OK :", neededColumns)
-    return titleRow
-
-def getFirstFieldStartingBy(row, startName):
-    """ in the dictionary row, get first field name starting with startName
-        and its value """
-    value = "?"
-    for fieldName in row.keys():
-        if fieldName.startswith(startName):
-            value = row[fieldName]
-            break
-    if value == "?":
-        fieldName = startName
-    return fieldName, value
+
+    fieldCommune = None
+    descColumns = []
+    for field in titleRow:
+        # Place name is not written in description info balloon
+        if field.startswith(neededColumns[0]):
+            continue
+        if field.startswith('Commune'):
+            kind = 'commune'
+            if fieldCommune is None:
+                fieldCommune = field
+        elif field in fullNeededColumns[1:]:
+            kind = 'coord'
+        else:
+            kind = 'texte'
+        descColumns.append((field, field.strip(), kind))
+
+    return {'titleRow':titleRow,
+            'nom':fullNeededColumns[0],
+            'coords':fullNeededColumns[1:],
+            'commune':fieldCommune,
+            'descColumns':descColumns,
+            'description':DescriptionTemplate(titleRow, descColumns, templateText)}
+
+class DescriptionTemplate():
+    """ Modèle de la bulle d'info, compilé une fois pour les colonnes d'une table
+        Le texte du modèle est du HTML où {Titre colonne} est remplacé par la valeur
+        de la colonne de ce titre ou à défaut de la première colonne dont le titre
+        commence par Titre colonne (comme Nom, Lat et Lon). Une ligne du modèle contenant des champs n'est écrite que si
+        tous ses champs sont renseignés (valeur non vide et différente de ?).
+        Comme pour str.format, {{ et }} sont écrits { et }.
+        Modèle par défaut : titre Informations puis une ligne
+        <b>Titre colonne</b> : valeur<br/> par colonne de la bulle d'info """
+    HEADER_DEFAULT = "<h1>Informations</h1>\n"
+
+    def __init__(self, titleRow, descColumns, templateText=None):
+        """
+        parameters :
+            - titleRow : titres des colonnes utilisées
+            - descColumns : colonnes de la bulle d'info, voir checkNeededColumns
+            - templateText : texte du modèle, None pour le modèle par défaut
+        """
+        # Chaque ligne compilée est un tuple de textes fixes et de champs (colonne, type)
+        self.listLines = []
+        if templateText is None:
+            self.listLines.append((self.HEADER_DEFAULT,))
+            for field, label, kind in descColumns:
+                self.listLines.append(("<b>" + label + "</b> : ", (field, kind), "<br/>\n"))
+            return
+
+        dictKinds = {field:'texte' for field in titleRow}
+        dictKinds.update({field:kind for field, _, kind in descColumns})
+        for line in templateText.splitlines(keepends=True):
+            listParts = []
+            posText = 0
+            for match in __REGEXP_TEMPLATE_FIELD__.finditer(line):
+                field = match.group('field')
+                if field is None:
+                    # Accolade doublée : texte fixe
+                    listParts.append(line[posText:match.start()] + match.group()[0])
+                    posText = match.end()
+                    continue
+                if field not in dictKinds:
+                    field = next((title for title in titleRow if title.startswith(field)), None)
+                if field is None:
+                    raise ValueError("Champ " + match.group() + " du modèle de description " +
+                                     "absent des colonnes : " + str(titleRow) +
+                                     " (accolades littérales à doubler : {{ }})")
+                if match.start() > posText:
+                    listParts.append(line[posText:match.start()])
+                listParts.append((field, dictKinds[field]))
+                posText = match.end()
+            if posText < len(line):
+                listParts.append(line[posText:])
+            self.listLines.append(tuple(listParts))
+
+    def render(self, row, coordValue):
+        """ Retourne la description HTML de la ligne row
+            coordValue : coordonnées converties de la ligne par nom de colonne """
+        listTexts = []
+        for line in self.listLines:
+            listTextsLine = []
+            for part in line:
+                if isinstance(part, str):
+                    listTextsLine.append(part)
+                    continue
+                field, kind = part
+                value = str(row[field]).strip()
+                if not value or value == '?':
+                    break
+
+                # Champs particuliers
+                if kind == 'commune':
+                    value = 'https://fr.wikipedia.org/wiki/' + value
+                elif kind == 'coord':
+                    # Ecrit dans le champ description les coordonnées converties
+                    value = str(coordValue[field])
+
+                if value.startswith("http"):
+                    value = formateURL(value, __REGEXP_SITE__)
+                listTextsLine.append(value)
+            else:
+                listTexts.extend(listTextsLine)
+        return "".join(listTexts)
 
 def convertCoord(coord):
     """ Convertit une chaine de coordonnées d'angle en un réel
@@ -412,9 +1735,7 @@ def convertCoord(coord):
     try:
         valFloat = float(coord)
     except ValueError:
-        # re OK pour expression du type 44°51'37" ou 1°51'37" ou 1°51'37"" ou 1°51'37" "
-        m = re.search(r'(?P<degres>[\d]{1,2})°(?P<minutes>[\d]{2})\'(?P<secondes>[\d]{2})"',
-                      coord)
+        m = __REGEXP_COORD_SEXAGESIMAL__.search(coord)
         if m:
             valFloat = float(m.group('degres')) + float(m.group('minutes')) / 60. + \
                        float(m.group('secondes')) / 3600.
@@ -422,8 +1743,64 @@ def convertCoord(coord):
             raise
     return valFloat
 
+def convertCoordColumn(listCoord):
+    """ Convertit en un seul passage une colonne de coordonnées d'angle (Lat ou Lon)
+        Les valeurs peuvent être décimales ou sexagésimales comme pour convertCoord
+        listCoord peut être un tableau numpy de réels (colonne d'un fichier Parquet ou Arrow)
+        Retourne un tableau numpy de réels et le masque numpy des valeurs incorrectes
+        Nécessite le module numpy """
+    import numpy
+
+    # Colonne déjà numérique : pas de passage par le texte, NaN pour une valeur absente
+    if isinstance(listCoord, numpy.ndarray) and listCoord.dtype.kind == 'f':
+        return listCoord, numpy.isnan(listCoord)
+
+    arrayText = numpy.array(listCoord, dtype=str)
+    arrayInvalid = numpy.zeros(len(arrayText), dtype=bool)
+
+    # Cas général : toutes les valeurs sont décimales
+    try:
+        return arrayText.astype(numpy.float64), arrayInvalid
+    except ValueError:
+        pass
+
+    arrayCoord = numpy.full(len(arrayText), -1.0)
+    isSexagesimal = numpy.char.find(arrayText, '°') >= 0
+    isEmpty = numpy.char.str_len(numpy.char.strip(arrayText)) == 0
+    arrayInvalid[isEmpty] = True
+
+    # Valeurs décimales, conversion unitaire seulement si l'une est incorrecte
+    indexDecimal = numpy.flatnonzero(~isSexagesimal & ~isEmpty)
+    try:
+        arrayCoord[indexDecimal] = arrayText[indexDecimal].astype(numpy.float64)
+    except ValueError:
+        for index in indexDecimal:
+            try:
+                arrayCoord[index] = float(arrayText[index])
+            except ValueError:
+                arrayInvalid[index] = True
+
+    # Valeurs sexagésimales : une seule recherche sur toutes les valeurs, 1 par ligne
+    indexSexagesimal = numpy.flatnonzero(isSexagesimal)
+    if len(indexSexagesimal) > 0:
+        textSexagesimal = '\n'.join(numpy.char.replace(arrayText[indexSexagesimal],
+                                                        '\n', ' ').tolist())
+        arrayDMS = numpy.array(__REGEXP_COORD_SEXAGESIMAL_LINES__.findall(textSexagesimal),
+                               dtype=str).reshape(-1, 3)
+        isMatched = arrayDMS[:, 0] != ''
+        arrayDMS[~isMatched] = '0'
+        arrayDMS = arrayDMS.astype(numpy.float64)
+        arrayCoord[indexSexagesimal] = arrayDMS[:, 0] + arrayDMS[:, 1] / 60. + \
+                                       arrayDMS[:, 2] / 3600.
+        arrayInvalid[indexSexagesimal[~isMatched]] = True
+
+    return arrayCoord, arrayInvalid
+
+@functools.lru_cache(maxsize=_SIZE_CACHE_URL_)
 def formateURL(url, regexpSite):
-    """ Formate une URL en HTML """
+    """ Formate une URL en HTML
+        Les mêmes URL reviennent souvent (liens Wikipedia des communes...) :
+        les derniers résultats sont conservés pour toutes les conversions du processus """
     url = url.strip()
     tagA = url
     match = regexpSite.search(url)
@@ -433,16 +1810,139 @@ def formateURL(url, regexpSite):
         tagA += '</a>'
     return tagA
 
-def genKMLFiles(listInfoRead, titleKML, pictoName, pathKMLFile, includePicto, isVerbose):
-    """ genere un fichier de sortie KML"""
+def genKMLFiles(listInfoRead, titleKML, pictoName, pathKMLFile, includePicto, isVerbose,
+                useSimplekml=False, isKMZ=False, isQuiet=False):
+    """ genere un fichier de sortie KML
+        listInfoRead peut être une liste ou un itérateur d'éléments
+        useSimplekml : utilise le module simplekml au lieu de l'écriture directe
+        isKMZ : pathKMLFile est une archive KMZ compressée
+        isQuiet : n'affiche pas la progression (écriture dans un thread)
+        Retourne le nombre d'éléments écrits """
+
+    if not isQuiet:
+        print("Ecriture des résultats dans", pathKMLFile, "...")
+    titleKML = titleKML + " " + time.strftime("%d/%m/%y")
+
+    if useSimplekml:
+        dataPicto = convertFile2Base64(pictoName, includePicto, isVerbose)
+        nbElements = genKMLFileSimplekml(listInfoRead, titleKML, dataPicto, pathKMLFile, isKMZ)
+    else:
+        nbElements = 0
+        with openKMLOutput(pathKMLFile, pictoName, includePicto, isVerbose,
+                           isKMZ) as (hKMLFile, dataPicto):
+            kmlWriter = KMLWriter(hKMLFile, titleKML, dataPicto)
+            for element in listInfoRead:
+                kmlWriter.writePlacemark(element)
+            kmlWriter.close()
+            nbElements = kmlWriter.nbPlacemarks
+
+    if not isQuiet:
+        print(str(nbElements), "éléments écrits dans", pathKMLFile)
+    return nbElements
+
+def genOutputFiles(listInfoRead, listFormats, titleKML, pictoName, pathKMLFile, includePicto,
+                   isVerbose):
+    """ Ecrit les éléments de listInfoRead dans un fichier par format de listFormats
+        Les fichiers sont écrits en même temps, chacun par un thread,
+        à partir des mêmes éléments
+        pathKMLFile : chemin du fichier KML, les autres en sont déduits
+        Retourne le nombre d'éléments écrits """
+    pathBase = pathKMLFile[:-len(".kml")]
+    # Picto lu une seule fois avant l'écriture simultanée des fichiers KML et KMZ :
+    # readPicto le mémorise
+    if {"kml", "kmz"} & set(listFormats):
+        readPicto(pictoName, includePicto, isVerbose)
+
+    # Les threads d'écriture n'affichent rien : les bilans sont affichés
+    # après l'écriture de tous les fichiers, dans l'ordre des formats
+    listPathFiles = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(listFormats)) as executor:
+        listFutures = []
+        for nameFormat in listFormats:
+            if nameFormat == "kml":
+                listPathFiles.append(pathBase + ".kml")
+                listFutures.append(executor.submit(genKMLFiles, listInfoRead, titleKML,
+                                                   pictoName, listPathFiles[-1],
+                                                   includePicto, False, False, False, True))
+            elif nameFormat == "kmz":
+                listPathFiles.append(pathBase + ".kmz")
+                listFutures.append(executor.submit(genKMLFiles, listInfoRead, titleKML,
+                                                   pictoName, listPathFiles[-1],
+                                                   includePicto, False, False, True, True))
+            elif nameFormat == "geojson":
+                listPathFiles.append(pathBase + ".geojson")
+                listFutures.append(executor.submit(genGeoJSONFile, listInfoRead, titleKML,
+                                                   listPathFiles[-1], True))
+            elif nameFormat == "csv":
+                listPathFiles.append(pathBase + SUFFIX_NORMALISE)
+                listFutures.append(executor.submit(genCSVFile, listInfoRead,
+                                                   listPathFiles[-1], True))
+            else:
+                raise ValueError("Format de sortie inconnu : " + nameFormat)
+        print("Ecriture des résultats dans", ", ".join(listPathFiles), "...")
+        concurrent.futures.wait(listFutures)
+
+    # Remonte la première erreur d'écriture
+    listNbElements = [future.result() for future in listFutures]
+    for pathFile, nbElements in zip(listPathFiles, listNbElements):
+        print(str(nbElements), "éléments écrits dans", pathFile)
+    return max(listNbElements)
+
+def genGeoJSONFile(listInfoRead, titleKML, pathGeoJSONFile, isQuiet=False):
+    """ genere un fichier GeoJSON (RFC 7946) : un Feature Point par élément,
+        nom, commune et description dans ses propriétés
+        isQuiet : n'affiche pas la progression (écriture dans un thread)
+        Retourne le nombre d'éléments écrits """
+    if not isQuiet:
+        print("Ecriture des résultats dans", pathGeoJSONFile, "...")
+    nbElements = 0
+    with open(pathGeoJSONFile, 'w', encoding='utf-8') as hGeoJSONFile:
+        hGeoJSONFile.write('{"type": "FeatureCollection", "name": ' +
+                           json.dumps(titleKML, ensure_ascii=False) + ',\n"features": [\n')
+        for element in listInfoRead:
+            feature = {'type':'Feature',
+                       'geometry':{'type':'Point',
+                                   'coordinates':[element['longitude'], element['latitude']]},
+                       'properties':{'nom':element['nom'],
+                                     'commune':element.get('Commune', ""),
+                                     'description':element['description']}}
+            hGeoJSONFile.write((",\n" if nbElements > 0 else "") +
+                               json.dumps(feature, ensure_ascii=False))
+            nbElements += 1
+        hGeoJSONFile.write('\n]}\n')
+    if not isQuiet:
+        print(str(nbElements), "éléments écrits dans", pathGeoJSONFile)
+    return nbElements
+
+def genCSVFile(listInfoRead, pathCSVFile, isQuiet=False):
+    """ genere une table CSV normalisée, relisible par ce programme :
+        Nom, Latitude, Longitude (degrés décimaux), Commune, Description (HTML
+        sur une seule ligne)
+        isQuiet : n'affiche pas la progression (écriture dans un thread)
+        Retourne le nombre d'éléments écrits """
+    if not isQuiet:
+        print("Ecriture des résultats dans", pathCSVFile, "...")
+    nbElements = 0
+    with open(pathCSVFile, 'w', encoding='utf-8', newline='') as hCSVFile:
+        writer = csv.writer(hCSVFile, delimiter=',', quoting=csv.QUOTE_ALL)
+        writer.writerow(["Nom", "Latitude", "Longitude", "Commune", "Description"])
+        for element in listInfoRead:
+            writer.writerow([element['nom'], element['latitude'], element['longitude'],
+                             element.get('Commune', ""),
+                             element['description'].replace('\n', ' ')])
+            nbElements += 1
+    if not isQuiet:
+        print(str(nbElements), "éléments écrits dans", pathCSVFile)
+    return nbElements
+
+def genKMLFileSimplekml(listInfoRead, titleKML, dataPicto, pathKMLFile, isKMZ=False):
+    """ genere un fichier de sortie KML ou KMZ avec le module simplekml
+        Tout le document est construit en mémoire avant l'écriture
+        Retourne le nombre d'éléments écrits """
 
     # Ref simplekml : https://simplekml.readthedocs.io/en/latest
     import simplekml
 
-    dataPicto = convertFile2Base64(pictoName, includePicto, isVerbose)
-
-    print("Ecriture des résultats dans", pathKMLFile, "...")
-    titleKML = titleKML + " " + time.strftime("%d/%m/%y")
     kml = simplekml.Kml(name=titleKML)
 
     # Style icone et couleur du texte pour tous les éléments
@@ -452,37 +1952,462 @@ def genKMLFiles(listInfoRead, titleKML, pictoName, pathKMLFile, includePicto, is
     if dataPicto is not None:
         styleIcon.iconstyle.icon.href = dataPicto
 
+    nbElements = 0
     for element in listInfoRead:
+        nbElements += 1
         point = kml.newpoint(name=element['nom'],
                              description='<![CDATA[' + element['description'] + ']]>\n',
                              coords=[(str(element['longitude']), str(element['latitude']))])
         point.style = styleIcon
 
-    kml.save(pathKMLFile)
-    print(str(len(listInfoRead)), "éléments écrits dans", pathKMLFile)
+    if isKMZ:
+        kml.savekmz(pathKMLFile)
+    else:
+        kml.save(pathKMLFile)
+    return nbElements
+
+@contextlib.contextmanager
+def openKMLOutput(pathKMLFile, pictoName, includePicto, isVerbose, isKMZ=False):
+    """ Ouvre en écriture le fichier résultat
+        Produit le flux texte du document KML et la référence du picto pour son style
+        isKMZ : le document est écrit compressé dans l'archive KMZ pathKMLFile,
+                le picto inclus y est stocké une seule fois en binaire """
+    if not isKMZ:
+        dataPicto = convertFile2Base64(pictoName, includePicto, isVerbose)
+        with open(pathKMLFile, 'w', encoding='utf-8') as hKMLFile:
+            yield hKMLFile, dataPicto
+        return
+
+    contentPicto = readPicto(pictoName, includePicto, isVerbose)
+    hrefPicto = contentPicto
+    if isinstance(contentPicto, bytes):
+        namePicto = os.path.basename(urllib.parse.urlparse(pictoName).path) or "picto.png"
+        hrefPicto = "files/" + namePicto
+    with zipfile.ZipFile(pathKMLFile, 'w', compression=zipfile.ZIP_DEFLATED) as hKMZFile:
+        # Le document doit être le premier membre de l'archive
+        infoDoc = zipfile.ZipInfo("doc.kml", date_time=time.localtime()[:6])
+        infoDoc.compress_type = zipfile.ZIP_DEFLATED
+        with hKMZFile.open(infoDoc, 'w', force_zip64=True) as hDocFile:
+            hKMLFile = io.TextIOWrapper(hDocFile, encoding='utf-8')
+            yield hKMLFile, hrefPicto
+            hKMLFile.flush()
+            hKMLFile.detach()
+        if isinstance(contentPicto, bytes):
+            # Image déjà compressée : stockée telle quelle
+            hKMZFile.writestr(hrefPicto, contentPicto, compress_type=zipfile.ZIP_STORED)
+        if isVerbose:
+            for info in hKMZFile.infolist():
+                print("Archive KMZ :", info.filename, info.file_size, "octets,",
+                      info.compress_size, "compressés")
+
+def genKMLTiles(listInfoRead, titleKML, pictoName, pathKMLFile, includePicto, isVerbose,
+                nbMaxTile):
+    """ genere un calque découpé en tuiles selon un quadtree :
+        chaque tuile contient au plus nbMaxTile éléments ou 4 tuiles filles,
+        et porte la Region de sa partie de carte.
+        Le document pathKMLFile relie les premières tuiles par des NetworkLink,
+        les tuiles sont écrites dans le répertoire <nom>_tuiles.
+        Le client ne charge que les tuiles visibles.
+        Retourne le nombre d'éléments écrits """
+    listInfoRead = list(listInfoRead)
+    dataPicto = convertFile2Base64(pictoName, includePicto, isVerbose)
+
+    print("Ecriture des résultats dans", pathKMLFile, "...")
+    titleKML = titleKML + " " + time.strftime("%d/%m/%y")
+
+    # Les tuiles d'une conversion précédente sont supprimées
+    dirTiles = os.path.splitext(pathKMLFile)[0] + "_tuiles"
+    os.makedirs(dirTiles, exist_ok=True)
+    for nameFile in os.listdir(dirTiles):
+        if nameFile.startswith("t") and nameFile.endswith(".kml"):
+            os.remove(os.path.join(dirTiles, nameFile))
+
+    nbTiles = 0
+    with open(pathKMLFile, 'w', encoding='utf-8') as hKMLFile:
+        kmlWriter = KMLWriter(hKMLFile, titleKML, dataPicto)
+        if listInfoRead:
+            nbTiles = writeTileContent(kmlWriter, listInfoRead, getBoundingBox(listInfoRead), "t",
+                                       dirTiles, os.path.basename(dirTiles) + "/",
+                                       titleKML, dataPicto, nbMaxTile, 0)
+        kmlWriter.close()
+
+    print(str(len(listInfoRead)), "éléments écrits dans", pathKMLFile, "et",
+          nbTiles, "tuiles de", dirTiles)
+    return len(listInfoRead)
+
+def writeTileContent(kmlWriter, listElements, bbox, keyTile, dirTiles, prefixHref,
+                     titleKML, dataPicto, nbMaxTile, depth):
+    """ Ecrit dans kmlWriter le contenu de la tuile keyTile de Region bbox :
+        ses éléments s'ils sont moins de nbMaxTile,
+        sinon des liens vers ses 4 tuiles filles, écrites dans dirTiles
+        Retourne le nombre de fichiers tuiles écrits """
+    if len(listElements) <= nbMaxTile or depth >= _DEPTH_MAX_TILES_:
+        for element in listElements:
+            kmlWriter.writePlacemark(element)
+        return 0
+
+    # Découpage en 4 quarts : 0 : nord-ouest, 1 : nord-est, 2 : sud-ouest, 3 : sud-est
+    west, south, east, north = bbox
+    midLon = (west + east) / 2.
+    midLat = (south + north) / 2.
+    listBboxChild = [(west, midLat, midLon, north), (midLon, midLat, east, north),
+                     (west, south, midLon, midLat), (midLon, south, east, midLat)]
+    listElementsChild = [[], [], [], []]
+    for element in listElements:
+        numChild = (0 if element['latitude'] >= midLat else 2) + \
+                   (1 if element['longitude'] >= midLon else 0)
+        listElementsChild[numChild].append(element)
+
+    nbTiles = 0
+    for numChild, elementsChild in enumerate(listElementsChild):
+        if not elementsChild:
+            continue
+        keyChild = keyTile + str(numChild)
+        kmlWriter.writeNetworkLink(keyChild + " (" + str(len(elementsChild)) + ")",
+                                   prefixHref + keyChild + ".kml", listBboxChild[numChild])
+        with open(os.path.join(dirTiles, keyChild + ".kml"), 'w',
+                  encoding='utf-8') as hTileFile:
+            tileWriter = KMLWriter(hTileFile, titleKML + " " + keyChild, dataPicto,
+                                   listBboxChild[numChild])
+            nbTiles += 1 + writeTileContent(tileWriter, elementsChild, listBboxChild[numChild],
+                                            keyChild, dirTiles, "", titleKML, dataPicto,
+                                            nbMaxTile, depth + 1)
+            tileWriter.close()
+    return nbTiles
+
+def genKMLClusters(listInfoRead, titleKML, pictoName, pathKMLFile, includePicto, isVerbose,
+                   nbLevelsCluster, isKMZ=False):
+    """ genere un calque où les éléments proches sont regroupés selon le zoom :
+        la boite englobante des éléments est découpée en grilles de 2**niveau
+        cases de côté pour niveau de 0 à nbLevelsCluster-1.
+        Chaque case non vide est représentée par un élément de regroupement
+        placé au centre de gravité de ses éléments, affiché quand la case occupe
+        entre _SIZE_CLUSTER_PIXELS_ et 2 fois plus de pixels à l'écran.
+        Les éléments eux-mêmes sont affichés quand leur case de la grille la plus
+        fine occupe au moins _SIZE_CLUSTER_PIXELS_ pixels : sa case mère du dernier
+        niveau de regroupement en occupe alors 2 fois plus et disparaît,
+        chaque niveau prend ainsi le relais du précédent sans trou.
+        Le calcul est linéaire en nombre d'éléments et de niveaux.
+        Retourne le nombre d'éléments écrits """
+    listInfoRead = list(listInfoRead)
+    print("Ecriture des résultats dans", pathKMLFile, "...")
+    titleKML = titleKML + " " + time.strftime("%d/%m/%y")
+
+    with openKMLOutput(pathKMLFile, pictoName, includePicto, isVerbose,
+                       isKMZ) as (hKMLFile, dataPicto):
+        kmlWriter = KMLWriter(hKMLFile, titleKML, dataPicto)
+        if listInfoRead:
+            west, south, east, north = getBoundingBox(listInfoRead)
+            nbCellsFine = 2 ** (nbLevelsCluster - 1)
+            sizeLon = (east - west) / nbCellsFine
+            sizeLat = (north - south) / nbCellsFine
+
+            # Répartition des éléments dans la grille la plus fine
+            dictCellsFine = {}
+            for element in listInfoRead:
+                cell = (min(int((element['longitude'] - west) / sizeLon), nbCellsFine - 1),
+                        min(int((element['latitude'] - south) / sizeLat), nbCellsFine - 1))
+                dictCellsFine.setdefault(cell, []).append(element)
+
+            # Regroupements des niveaux les moins détaillés,
+            # agrégés à partir des cases de la grille la plus fine
+            for level in range(nbLevelsCluster - 1):
+                shift = nbLevelsCluster - 1 - level
+                dictClusters = {}
+                for (ixFine, iyFine), elementsCell in dictCellsFine.items():
+                    cluster = dictClusters.setdefault((ixFine >> shift, iyFine >> shift),
+                                                      [0, 0., 0., None])
+                    cluster[0] += len(elementsCell)
+                    cluster[1] += sum(element['longitude'] for element in elementsCell)
+                    cluster[2] += sum(element['latitude'] for element in elementsCell)
+                    cluster[3] = elementsCell[0]
+                for (ix, iy), (nbElements, sumLon, sumLat, firstElement) in \
+                        sorted(dictClusters.items()):
+                    kmlWriter.openFolder(getCellBbox(west, south, sizeLon * (1 << shift),
+                                                     sizeLat * (1 << shift), ix, iy),
+                                         _SIZE_CLUSTER_PIXELS_ if level > 0 else 0,
+                                         2 * _SIZE_CLUSTER_PIXELS_)
+                    if nbElements == 1:
+                        kmlWriter.writePlacemark(firstElement)
+                    else:
+                        kmlWriter.writeFragment(KMLWriter.formatPlacemark(
+                            {'nom':str(nbElements),
+                             'description':str(nbElements) + " éléments",
+                             'longitude':sumLon / nbElements,
+                             'latitude':sumLat / nbElements}))
+                    kmlWriter.closeFolder()
+
+            # Eléments individuels, dans la case de la grille la plus fine
+            for (ix, iy), elementsCell in sorted(dictCellsFine.items()):
+                kmlWriter.openFolder(getCellBbox(west, south, sizeLon, sizeLat, ix, iy),
+                                     _SIZE_CLUSTER_PIXELS_ if nbLevelsCluster > 1 else 0)
+                for element in elementsCell:
+                    kmlWriter.writePlacemark(element)
+                kmlWriter.closeFolder()
+        kmlWriter.close()
+
+    print(str(len(listInfoRead)), "éléments écrits dans", pathKMLFile, "regroupés sur",
+          nbLevelsCluster, "niveaux")
+    return len(listInfoRead)
+
+def getCellBbox(west, south, sizeLon, sizeLat, ix, iy):
+    """ Retourne (ouest, sud, est, nord) de la case (ix, iy) d'une grille
+        d'origine (west, south) et de cases de taille sizeLon x sizeLat """
+    return (west + ix * sizeLon, south + iy * sizeLat,
+            west + (ix + 1) * sizeLon, south + (iy + 1) * sizeLat)
+
+def genKMLFileIncremental(titleRow, rowIter, neededColumns, listMessage,
+                          titleKML, pictoName, pathKMLFile, includePicto, isVerbose, isKMZ=False,
+                          templateText=None, pathKMLReuse=None):
+    """ genere un fichier de sortie KML en réutilisant les Placemarks de la conversion
+        précédente, conservés avec l'empreinte de leur ligne dans un fichier annexe
+        <fichier KML>.cache.json : seule une conversion vers le même fichier KML
+        en profite, sauf si pathKMLReuse désigne le KML d'une autre conversion
+        Seules les lignes nouvelles ou modifiées sont formatées et mises en forme KML
+        Les lignes ignorées sont ajoutées à listMessage
+        Retourne le nombre d'éléments écrits """
+    pathCacheFile = pathKMLFile + EXT_CACHE
+    pathCacheRead = pathCacheFile
+    if pathKMLReuse is not None:
+        pathCacheRead = (pathKMLReuse if pathKMLReuse.endswith(EXT_CACHE)
+                         else pathKMLReuse + EXT_CACHE)
+    rowPlan = checkNeededColumns(titleRow, neededColumns, isVerbose, templateText)
+    canUseNumpy = importlib.util.find_spec("numpy") is not None
+
+    # Le contexte invalide le fichier annexe si les colonnes, le modèle de description
+    # ou son format changent
+    context = getFingerprint([VERSION_CACHE] + list(titleRow) + list(neededColumns) +
+                             [templateText or ""])
+    oldPlacemarks = {}
+    oldMessages = {}
+    try:
+        with open(pathCacheRead, 'r', encoding='utf-8') as hCacheFile:
+            cache = json.load(hCacheFile)
+        if cache.get('context') == context:
+            oldPlacemarks = cache['placemarks']
+            oldMessages = cache['messages']
+        elif isVerbose or pathKMLReuse is not None:
+            print("Fichier annexe", pathCacheRead, "obsolète : conversion complète")
+    except (IOError, ValueError, KeyError):
+        if isVerbose or pathKMLReuse is not None:
+            print("Pas de fichier annexe utilisable :", pathCacheRead)
+
+    print("Ecriture des résultats dans", pathKMLFile, "...")
+    titleKML = titleKML + " " + time.strftime("%d/%m/%y")
+
+    newPlacemarks = {}
+    newMessages = {}
+    nbReused = 0
+    with openKMLOutput(pathKMLFile, pictoName, includePicto, isVerbose,
+                       isKMZ) as (hKMLFile, dataPicto):
+        kmlWriter = KMLWriter(hKMLFile, titleKML, dataPicto)
+        numLigneFirst = 1
+        for chunkRows in iterChunks(rowIter, _SIZE_CHUNK_):
+            listFingerprint = [getFingerprint([row.get(field) for field in titleRow])
+                               for row in chunkRows]
+
+            # Formatage des seules lignes inconnues
+            listNewRows = [numRowChunk for numRowChunk, fingerprint in enumerate(listFingerprint)
+                           if fingerprint not in oldPlacemarks and
+                           fingerprint not in oldMessages and
+                           fingerprint not in newPlacemarks and
+                           fingerprint not in newMessages]
+            listElements, listMessageChunk = formatChunk(
+                rowPlan, [chunkRows[numRowChunk] for numRowChunk in listNewRows], 0, canUseNumpy)
+            for element in listElements:
+                fingerprint = listFingerprint[listNewRows[element['numLigne']]]
+                newPlacemarks[fingerprint] = KMLWriter.formatPlacemark(element)
+            for message in listMessageChunk:
+                fingerprint = listFingerprint[listNewRows[message['numLigne']]]
+                newMessages[fingerprint] = message['texte']
+
+            # Ecriture dans l'ordre des lignes
+            for numRowChunk, fingerprint in enumerate(listFingerprint):
+                if fingerprint in oldPlacemarks:
+                    newPlacemarks[fingerprint] = oldPlacemarks.pop(fingerprint)
+                    nbReused += 1
+                elif fingerprint in oldMessages:
+                    newMessages[fingerprint] = oldMessages.pop(fingerprint)
+                    nbReused += 1
+                if fingerprint in newPlacemarks:
+                    kmlWriter.writeFragment(newPlacemarks[fingerprint])
+                else:
+                    listMessage.append({'numLigne':numLigneFirst + numRowChunk,
+                                        'texte':newMessages[fingerprint]})
+            numLigneFirst += len(chunkRows)
+        kmlWriter.close()
+        nbElements = kmlWriter.nbPlacemarks
+
+    # Le nouveau fichier annexe ne contient que les lignes de cette conversion
+    pathCacheFileTmp = pathCacheFile + ".tmp"
+    with open(pathCacheFileTmp, 'w', encoding='utf-8') as hCacheFile:
+        json.dump({'context':context, 'placemarks':newPlacemarks, 'messages':newMessages},
+                  hCacheFile, ensure_ascii=False)
+    os.replace(pathCacheFileTmp, pathCacheFile)
+
+    print(str(nbElements), "éléments écrits dans", pathKMLFile)
+    print(nbReused, "lignes inchangées réutilisées,", numLigneFirst - 1 - nbReused,
+          "lignes nouvelles ou modifiées formatées")
+    return nbElements
+
+def getFingerprint(listValues):
+    """ Retourne l'empreinte (hash) d'une liste de valeurs """
+    text = '\x1f'.join(str(value) for value in listValues)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class KMLWriter():
+    """
+    Ecriture directe d'un document KML dans un flux texte ouvert :
+    chaque Placemark est écrit dès qu'il est produit, rien n'est conservé en mémoire.
+    """
+    # Couleur du texte des éléments : simplekml.Color.cadetblue (format aabbggrr)
+    COLOR_LABEL = "ffa09e5f"
+    ID_STYLE = "stylePicto"
+
+    def __init__(self, hFile, titleKML, dataPicto=None, bbox=None):
+        """
+        Ecrit l'entête du document et le style commun à tous les éléments
+        parameters :
+            - hFile : flux texte ouvert en écriture
+            - titleKML : nom du document
+            - dataPicto : URL ou données base64 du picto, None si pas de picto
+            - bbox : (ouest, sud, est, nord) : Region du document,
+                     affiché seulement quand elle est visible, None pour toujours
+        """
+        self.hFile = hFile
+        self.nbPlacemarks = 0
+        self.isClosed = False
+
+        self.hFile.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                         '<kml xmlns="http://www.opengis.net/kml/2.2">\n'
+                         '<Document>\n'
+                         '<name>' + escapeXML(titleKML) + '</name>\n')
+        if bbox is not None:
+            self.hFile.write(formatRegion(bbox, MIN_LOD_PIXELS))
+        self.hFile.write('<Style id="' + self.ID_STYLE + '">\n')
+        if dataPicto is not None:
+            self.hFile.write('<IconStyle><Icon><href>' + escapeXML(dataPicto) +
+                             '</href></Icon></IconStyle>\n')
+        self.hFile.write('<LabelStyle><color>' + self.COLOR_LABEL + '</color></LabelStyle>\n'
+                         '</Style>\n')
+
+    def writePlacemark(self, element):
+        """ Ecrit un élément de listInfoRead """
+        self.writeFragment(self.formatPlacemark(element))
+
+    def writeFragment(self, fragment):
+        """ Ecrit un Placemark déjà mis en forme par formatPlacemark """
+        self.hFile.write(fragment)
+        self.nbPlacemarks += 1
+
+    @classmethod
+    def formatPlacemark(cls, element):
+        """ Retourne le texte KML du Placemark d'un élément de listInfoRead """
+        return ('<Placemark>\n'
+                '<name>' + escapeXML(element['nom']) + '</name>\n'
+                '<description>' + toCDATA(element['description']) + '</description>\n'
+                '<styleUrl>#' + cls.ID_STYLE + '</styleUrl>\n'
+                '<Point><coordinates>' + str(element['longitude']) + ',' +
+                str(element['latitude']) + ',0.0</coordinates></Point>\n'
+                '</Placemark>\n')
+
+    def writeNetworkLink(self, name, href, bbox):
+        """ Ecrit un lien vers le document href chargé quand sa Region bbox est visible """
+        self.hFile.write('<NetworkLink>\n'
+                         '<name>' + escapeXML(name) + '</name>\n' +
+                         formatRegion(bbox, MIN_LOD_PIXELS) +
+                         '<Link><href>' + escapeXML(href) + '</href>'
+                         '<viewRefreshMode>onRegion</viewRefreshMode></Link>\n'
+                         '</NetworkLink>\n')
+
+    def openFolder(self, bbox, minLodPixels, maxLodPixels=-1):
+        """ Ouvre un dossier affiché quand la taille à l'écran de sa Region bbox
+            est comprise entre minLodPixels et maxLodPixels """
+        self.hFile.write('<Folder>\n' + formatRegion(bbox, minLodPixels, maxLodPixels))
+
+    def closeFolder(self):
+        """ Ferme le dossier ouvert par openFolder """
+        self.hFile.write('</Folder>\n')
+
+    def close(self):
+        """ Termine le document, le flux reste ouvert """
+        if not self.isClosed:
+            self.hFile.write('</Document>\n</kml>\n')
+            self.isClosed = True
+
+def formatRegion(bbox, minLodPixels, maxLodPixels=-1):
+    """ Retourne le texte KML d'une Region
+        bbox : (ouest, sud, est, nord) en degrés décimaux
+        minLodPixels, maxLodPixels : taille à l'écran de la Region (pixels)
+            entre lesquelles son contenu est affiché, -1 : pas de limite """
+    west, south, east, north = bbox
+    return ('<Region><LatLonAltBox>'
+            '<north>' + str(north) + '</north><south>' + str(south) + '</south>'
+            '<east>' + str(east) + '</east><west>' + str(west) + '</west>'
+            '</LatLonAltBox>'
+            '<Lod><minLodPixels>' + str(minLodPixels) + '</minLodPixels>'
+            '<maxLodPixels>' + str(maxLodPixels) + '</maxLodPixels></Lod>'
+            '</Region>\n')
+
+def getBoundingBox(listInfoRead):
+    """ Retourne (ouest, sud, est, nord) des éléments de listInfoRead
+        Une boite de taille nulle est élargie pour rester visible """
+    listLongitude = [element['longitude'] for element in listInfoRead]
+    listLatitude = [element['latitude'] for element in listInfoRead]
+    west, east = min(listLongitude), max(listLongitude)
+    south, north = min(listLatitude), max(listLatitude)
+    if east - west < _SIZE_BBOX_MIN_:
+        west, east = west - _SIZE_BBOX_MIN_ / 2., east + _SIZE_BBOX_MIN_ / 2.
+    if north - south < _SIZE_BBOX_MIN_:
+        south, north = south - _SIZE_BBOX_MIN_ / 2., north + _SIZE_BBOX_MIN_ / 2.
+    return west, south, east, north
+
+def escapeXML(text):
+    """ Remplace les caractères spéciaux XML &, <, > et " par leurs entités """
+    return xml.sax.saxutils.escape(str(text), {'"': "&quot;"})
+
+def toCDATA(text):
+    """ Encapsule text dans une section CDATA
+        Une séquence ]]> dans le texte est découpée sur 2 sections CDATA """
+    return '<![CDATA[' + text.replace(']]>', ']]]]><![CDATA[>') + ']]>'
 
 def convertFile2Base64(pictoName, includePicto, isVerbose):
     """ Return None if pictoName is empty
         Return pictoName if pictoName is an URL and includePicto == False
         else encode image content in base64 """
 
-    encodeBase64 = False
+    # Picto téléchargé : encodé une seule fois par processus
+    if pictoName in _PICTO_CACHE_.memoBase64 and includePicto:
+        return _PICTO_CACHE_.memoBase64[pictoName]
+
+    contentPicto = readPicto(pictoName, includePicto, isVerbose)
+    if isinstance(contentPicto, bytes):
+        if isVerbose:
+            print("Encodage en base64 de l'image", os.path.basename(pictoName))
+        resultStr = "data:image/png;base64,"
+        resultStr += base64.b64encode(contentPicto).decode('utf8')
+        if isVerbose:
+            print("Nombre de caracteres base64 :", len(resultStr))
+        if pictoName.startswith("http"):
+            _PICTO_CACHE_.memoBase64[pictoName] = resultStr
+    else:
+        resultStr = contentPicto
+
+    return resultStr
+
+def readPicto(pictoName, includePicto, isVerbose):
+    """ Return None if pictoName is empty
+        Return pictoName if pictoName is an URL and includePicto == False
+        else return image content (bytes) """
+
     strPicto = None
 
     # If the picto name contains something
     if len(pictoName) > 0:
         if pictoName.startswith("http") and includePicto:
-            # Pour ressembler à un navigateur Mozilla/5.0
-            opener = urllib.request.build_opener()
-            opener.addheaders = [('User-agent', 'Mozilla/5.0')]
-            if isVerbose:
-                print("get URL content :", pictoName)
-            # Envoi requete, lecture de la page
-            with opener.open(pictoName) as infile:
-                strPicto = infile.read()
-                encodeBase64 = True
-                if isVerbose:
-                    print("Nombre de caracteres lus :", len(strPicto))
+            with _PROFILER_.stage("picto", pictoName) as infoStage:
+                strPicto = _PICTO_CACHE_.getURL(pictoName, isVerbose)
+                infoStage['nbBytes'] = len(strPicto)
 
         elif pictoName.startswith("http") and not includePicto:
             strPicto = pictoName
@@ -493,26 +2418,394 @@ def convertFile2Base64(pictoName, includePicto, isVerbose):
             if isVerbose:
                 print("get local file content :", pictoName)
             # Lecrure du fichier local : mode binaire
-            with open(pictoName, 'rb') as hPicto:
-                strPicto = hPicto.read()
-                encodeBase64 = True
-                if isVerbose:
-                    print("Nombre de caracteres lus :", len(strPicto))
+            with _PROFILER_.stage("picto", pictoName) as infoStage:
+                strPicto = readLocalPicto(pictoName, os.path.getmtime(pictoName))
+                infoStage['nbBytes'] = len(strPicto)
+            if isVerbose:
+                print("Nombre de caracteres lus :", len(strPicto))
+
+    return strPicto
+
+@functools.lru_cache(maxsize=8)
+def readLocalPicto(pathPicto, dateModif):
+    """ Retourne le contenu du fichier picto local pathPicto,
+        mémorisé par chemin et date de modification dateModif :
+        un picto modifié est relu """
+    # pylint: disable=W0613
+    with open(pathPicto, 'rb') as hPicto:
+        return hPicto.read()
 
-    if encodeBase64 :
+class PictoCache():
+    """
+    Cache disque des pictos téléchargés avec l'option -i.
+    Le contenu est conservé avec ses entêtes ETag et Last-Modified
+    et revalidé par une requête conditionnelle à chaque conversion,
+    sauf en mode hors ligne où seul le cache est utilisé.
+    Dans un même processus, un picto n'est téléchargé et encodé qu'une fois.
+    """
+    # Délai maximum d'attente du serveur (s)
+    TIMEOUT = 30
+
+    def __init__(self, dirCache=None, isOffline=False):
+        """
+        Constructor
+        parameters :
+            - dirCache : répertoire du cache, par défaut $TABLE2KML_CACHE
+                         ou ~/.cache/table2kml
+            - isOffline : si True, aucune requête réseau
+        """
+        if dirCache is None:
+            dirCache = os.environ.get("TABLE2KML_CACHE",
+                                      os.path.join(os.path.expanduser("~"), ".cache",
+                                                   "table2kml"))
+        self.dirCache = dirCache
+        self.isOffline = isOffline
+        self.memoContent = {}
+        self.memoBase64 = {}
+        # URL dont le contenu est enregistré dans le cache disque
+        self.setURLCached = set()
+
+    def getURL(self, url, isVerbose):
+        """ Retourne le contenu (bytes) désigné par url """
+        if url in self.memoContent:
+            return self.memoContent[url]
+
+        keyURL = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        pathContent = os.path.join(self.dirCache, keyURL + ".data")
+        pathInfo = os.path.join(self.dirCache, keyURL + ".json")
+        content = None
+        infoCache = {}
+        try:
+            with open(pathInfo, 'r', encoding='utf-8') as hInfo:
+                infoCache = json.load(hInfo)
+            with open(pathContent, 'rb') as hContent:
+                content = hContent.read()
+        except (IOError, ValueError):
+            content = None
+            infoCache = {}
+
+        if self.isOffline:
+            if content is None:
+                raise IOError("Picto absent du cache en mode hors ligne : " + url)
+            if isVerbose:
+                print("Picto lu dans le cache (hors ligne) :", url)
+            isCached = True
+        else:
+            content, isCached = self.fetchURL(url, content, infoCache, pathContent, pathInfo,
+                                              isVerbose)
+
+        self.memoContent[url] = content
+        if isCached:
+            self.setURLCached.add(url)
+        return content
+
+    def fetchURL(self, url, content, infoCache, pathContent, pathInfo, isVerbose):
+        """ Télécharge url ou revalide la copie content du cache
+            Retourne le contenu à jour et True s'il est enregistré dans le cache disque """
+        # Pour ressembler à un navigateur Mozilla/5.0
+        headers = {'User-agent':'Mozilla/5.0'}
+        if content is not None:
+            if infoCache.get('etag'):
+                headers['If-None-Match'] = infoCache['etag']
+            if infoCache.get('lastModified'):
+                headers['If-Modified-Since'] = infoCache['lastModified']
         if isVerbose:
-            print("Encodage en base64 de l'image", os.path.basename(pictoName))
-        resultStr = "data:image/png;base64,"
-        resultStr += base64.b64encode(strPicto).decode('utf8')
+            print("get URL content :", url)
+
+        # Envoi requete, lecture de la page
+        try:
+            request = urllib.request.Request(url, headers=headers)
+            with urllib.request.urlopen(request, timeout=self.TIMEOUT) as infile:
+                newContent = infile.read()
+                infoCache = {'url':url,
+                             'etag':infile.headers.get('ETag'),
+                             'lastModified':infile.headers.get('Last-Modified')}
+        except OSError as exc:
+            if isinstance(exc, urllib.error.HTTPError) and exc.code == 304 and \
+               content is not None:
+                if isVerbose:
+                    print("Picto inchangé, lu dans le cache :", url)
+                return content, True
+            if content is None:
+                raise
+            print("Attention : picto non revalidé (" + str(exc) + "), copie du cache utilisée")
+            return content, True
+
         if isVerbose:
-            print("Nombre de caracteres base64 :", len(resultStr))
-    else:
-        resultStr = strPicto
+            print("Nombre de caracteres lus :", len(newContent))
 
-    return resultStr
+        # Enregistrement dans le cache : échec non bloquant
+        try:
+            os.makedirs(self.dirCache, exist_ok=True)
+            for pathFile, mode, data in ((pathContent, 'wb', newContent),
+                                         (pathInfo, 'w', json.dumps(infoCache))):
+                pathTmp = pathFile + "." + str(os.getpid()) + ".tmp"
+                with open(pathTmp, mode) as hFile:
+                    hFile.write(data)
+                os.replace(pathTmp, pathFile)
+        except IOError as exc:
+            print("Attention : picto non enregistré dans le cache :", str(exc))
+            return newContent, False
+        return newContent, True
+
+# Cache des pictos partagé par toutes les conversions du processus
+_PICTO_CACHE_ = PictoCache()
+
+class StageProfiler():
+    """
+    Mesure des étapes d'une conversion :
+    - option --profile : temps écoulé et temps CPU, lignes/s et octets de chaque étape,
+      écrits dans un rapport JSON.
+    - option --memory : pic et reste de mémoire allouée par Python (tracemalloc),
+      RSS max du processus et taille des structures intermédiaires de chaque étape.
+    - option --memory-max : arrêt de la conversion par une ValueError dès que la mémoire
+      courante dépasse memoryMax octets, vérifiée à chaque paquet de lignes et fin d'étape.
+    Désactivé, stage() ne fait aucune mesure.
+    """
+    def __init__(self):
+        self.isEnabled = False
+        self.isMemory = False
+        self.memoryMax = 0
+        self.listStages = []
+        self.nameStage = ""
+        # resource : Unix seulement
+        self.canUseResource = importlib.util.find_spec("resource") is not None
+
+    def getConfig(self):
+        """ Retourne les réglages à transmettre aux processus de conversion """
+        return {'isEnabled' : self.isEnabled, 'isMemory' : self.isMemory,
+                'memoryMax' : self.memoryMax}
+
+    def setConfig(self, config):
+        """ Applique les réglages retournés par getConfig """
+        self.isEnabled = config['isEnabled']
+        self.isMemory = config['isMemory']
+        self.memoryMax = config['memoryMax']
+
+    @contextlib.contextmanager
+    def stage(self, name, pathFile=""):
+        """ Mesure le bloc with : l'appelant complète nbRows et nbBytes
+            dans le dictionnaire retourné, et la taille des structures avec measureData """
+        infoStage = {'stage' : name, 'file' : pathFile, 'nbRows' : 0, 'nbBytes' : 0}
+        if not (self.isEnabled or self.isMemory or self.memoryMax > 0):
+            yield infoStage
+            return
+        nameStagePrevious = self.nameStage
+        self.nameStage = name
+        if self.isMemory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            startMemory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        startWall = time.perf_counter()
+        startCPU = time.process_time()
+        try:
+            yield infoStage
+        finally:
+            infoStage['wallTime'] = time.perf_counter() - startWall
+            infoStage['cpuTime'] = time.process_time() - startCPU
+            infoStage['rowsPerSecond'] = (infoStage['nbRows'] / infoStage['wallTime']
+                                          if infoStage['wallTime'] > 0. else 0.)
+            self.nameStage = nameStagePrevious
+            if self.isMemory:
+                currentMemory, peakMemory = tracemalloc.get_traced_memory()
+                infoStage['memoryPeak'] = peakMemory
+                infoStage['memoryRetained'] = currentMemory - startMemory
+                infoStage['rssMax'] = self.getRSSMax()
+                self.printMemory(infoStage)
+            self.listStages.append(infoStage)
+        self.checkMemory(name)
+
+    def measureData(self, infoStage, data):
+        """ Enregistre dans infoStage la taille estimée de la structure data :
+            liste de lignes ou d'éléments (dictionnaires ou listes de valeurs) """
+        if not self.isMemory:
+            return
+        sizeData = sys.getsizeof(data)
+        for item in data:
+            sizeData += sys.getsizeof(item)
+            values = item.values() if isinstance(item, dict) else item
+            sizeData += sum(sys.getsizeof(value) for value in values)
+        infoStage['sizeData'] = sizeData
+
+    def getRSSMax(self):
+        """ Retourne le RSS max du processus en octets, 0 si inconnu """
+        if not self.canUseResource:
+            return 0
+        import resource
+        rssMax = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss : ko sous Linux, octets sous macOS
+        return rssMax if platform.system() == "Darwin" else rssMax * 1024
+
+    @staticmethod
+    def getRSSCurrent():
+        """ Retourne le RSS courant du processus en octets, 0 si inconnu :
+            module psutil s'il est installé, sinon /proc/self/statm (Linux) """
+        if _CAN_USE_PSUTIL_:
+            import psutil
+            return psutil.Process().memory_info().rss
+        try:
+            with open("/proc/self/statm", 'r') as hStatm:
+                return int(hStatm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, ValueError, IndexError, AttributeError):
+            return 0
+
+    def checkMemory(self, name=None):
+        """ Lève une ValueError si la mémoire dépasse memoryMax :
+            RSS courant du processus, à défaut mémoire allouée par Python.
+            Le RSS max n'est pas utilisé : il ne baisse jamais et condamnerait
+            les conversions suivantes du même processus (-b, --server) """
+        if self.memoryMax <= 0:
+            return
+        memoryUsed = self.getRSSCurrent()
+        if memoryUsed == 0:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            memoryUsed = tracemalloc.get_traced_memory()[0]
+        if memoryUsed > self.memoryMax:
+            raise ValueError("Mémoire maximale dépassée à l'étape " +
+                             (name or self.nameStage or "?") + " : " +
+                             formatMegaBytes(memoryUsed) + " Mo utilisés pour " +
+                             formatMegaBytes(self.memoryMax) + " Mo autorisés (--memory-max)")
+
+    @staticmethod
+    def printMemory(infoStage):
+        """ Affiche les mesures mémoire d'une étape """
+        print("Mémoire", infoStage['stage'], ": pic",
+              formatMegaBytes(infoStage['memoryPeak']), "Mo, retenue",
+              formatMegaBytes(infoStage['memoryRetained']), "Mo, RSS max",
+              formatMegaBytes(infoStage['rssMax']), "Mo" +
+              (", structure " + formatMegaBytes(infoStage['sizeData']) + " Mo"
+               if 'sizeData' in infoStage else ""))
+
+    def writeReport(self, pathReport, nomProg, version):
+        """ Ecrit le rapport JSON des étapes mesurées """
+        report = {'program' : nomProg, 'version' : version,
+                  'date' : time.strftime("%Y-%m-%dT%H:%M:%S"),
+                  'python' : platform.python_version(),
+                  'wallTime' : sum(info['wallTime'] for info in self.listStages),
+                  'cpuTime' : sum(info['cpuTime'] for info in self.listStages),
+                  'stages' : self.listStages}
+        with open(pathReport, 'w', encoding='utf-8') as hReport:
+            json.dump(report, hReport, indent=2, ensure_ascii=False)
+        print("Rapport de profilage écrit :", pathReport)
+
+# Mesure des étapes partagée par toutes les conversions du processus
+_PROFILER_ = StageProfiler()
+
+def formatMegaBytes(nbBytes):
+    """ Retourne nbBytes en Mo, 1 décimale """
+    return format(nbBytes / (1024. * 1024.), ".1f")
 
 
 ############
+class PagedListbox():
+    """
+    Liste tkinter pour les grandes conversions : seules les lignes visibles
+    sont insérées dans la Listbox, recalculées à chaque défilement.
+    Une zone de saisie filtre les lignes contenant le texte tapé
+    (sans distinction de majuscules), ex. un nom ou une commune.
+    """
+    def __init__(self, parent, background, height, width, formatItem):
+        """
+        parent : cadre tkinter recevant la liste, placée avec grid
+        height : nombre de lignes visibles
+        formatItem : fonction retournant le texte affiché pour un élément
+        """
+        import tkinter
+
+        self.height = height
+        self.formatItem = formatItem
+        self.listItems = []
+        self.listTextsLower = None
+        self.listIndexes = []
+        self.first = 0
+
+        tkinter.Label(parent, text="Filtre :").grid(row=0, column=0, sticky=tkinter.W)
+        self.filterVar = tkinter.StringVar()
+        self.filterVar.trace_add('write', self.applyFilter)
+        tkinter.Entry(parent, textvariable=self.filterVar,
+                      width=40).grid(row=0, column=1, sticky=tkinter.W)
+        self.countLabel = tkinter.Label(parent, text="")
+        self.countLabel.grid(row=0, column=1, sticky=tkinter.E)
+
+        self.listbox = tkinter.Listbox(parent, background=background,
+                                       height=height, width=width)
+        self.listbox.grid(row=1, columnspan=2)
+        self.scrollbarRight = tkinter.Scrollbar(parent, orient=tkinter.VERTICAL,
+                                                command=self.yview)
+        self.scrollbarRight.grid(row=1, column=2, sticky=tkinter.W+tkinter.N+tkinter.S)
+        scrollbarBottom = tkinter.Scrollbar(parent, orient=tkinter.HORIZONTAL,
+                                            command=self.listbox.xview)
+        scrollbarBottom.grid(row=2, columnspan=2, sticky=tkinter.N+tkinter.E+tkinter.W)
+        self.listbox.config(xscrollcommand=scrollbarBottom.set)
+
+        # Molette : Windows et macOS, puis X11
+        self.listbox.bind("<MouseWheel>",
+                          lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-1))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(1))
+        self.render()
+
+    def setItems(self, listItems):
+        """ Remplace les éléments affichés, le filtre en cours est appliqué """
+        self.listItems = listItems
+        self.listTextsLower = None
+        self.applyFilter()
+
+    def applyFilter(self, *args):
+        """ Ne retient que les éléments dont le texte contient le filtre """
+        # pylint: disable=W0613
+        pattern = self.filterVar.get().strip().lower()
+        if pattern:
+            # Textes en minuscules calculés une seule fois, au premier filtre
+            if self.listTextsLower is None:
+                self.listTextsLower = [self.formatItem(item).lower()
+                                       for item in self.listItems]
+            self.listIndexes = [numItem
+                                for numItem, text in enumerate(self.listTextsLower)
+                                if pattern in text]
+        else:
+            self.listIndexes = range(len(self.listItems))
+        self.first = 0
+        self.render()
+
+    def yview(self, *args):
+        """ Commande de la barre de défilement verticale """
+        nbItems = len(self.listIndexes)
+        if args[0] == 'moveto':
+            self.first = int(float(args[1]) * nbItems)
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            self.first += step * self.height if args[2] == 'pages' else step
+        self.render()
+        return "break"
+
+    def scroll(self, nbRows):
+        """ Défilement de nbRows lignes """
+        self.first += nbRows
+        self.render()
+        return "break"
+
+    def render(self):
+        """ Insère dans la Listbox les seules lignes visibles """
+        import tkinter
+
+        nbItems = len(self.listIndexes)
+        self.first = max(0, min(self.first, nbItems - self.height))
+        last = min(self.first + self.height, nbItems)
+        self.listbox.delete(0, tkinter.END)
+        for numItem in self.listIndexes[self.first:last]:
+            self.listbox.insert(tkinter.END, self.formatItem(self.listItems[numItem]))
+        if nbItems > 0:
+            self.scrollbarRight.set(self.first / nbItems, last / nbItems)
+        else:
+            self.scrollbarRight.set(0., 1.)
+        self.countLabel['text'] = (str(nbItems) + " / " + str(len(self.listItems)) +
+                                   " lignes")
+
 class table2kmlGUI():
     """
     A GUI for table2kml script.
@@ -527,6 +2820,7 @@ class table2kmlGUI():
             - isVerbose : If true, environment is OK for plotting
         """
         import tkinter
+        from tkinter import ttk
 
         self.URL_PICTO_DEFAULT = \
                 "https://upload.wikimedia.org/wikipedia/commons/e/eb/PointDolmen.png"
@@ -539,6 +2833,13 @@ class table2kmlGUI():
         self.isVerbose = isVerbose
         self.listMessage = []
         self.listInfoRead = []
+        # Conversions en tâche de fond : file des fichiers à convertir,
+        # file des messages de progression lue par pollConversions
+        self.jobQueue = queue.Queue()
+        self.eventQueue = queue.Queue()
+        self.listJobs = []
+        self.workerThread = None
+        self.isPolling = False
 
         self.root.title(title)
 
@@ -588,39 +2889,29 @@ class table2kmlGUI():
 
         tkinter.Button(inputFrame, text="Traiter le fichier",
                        command=self.launchInputFileReader,
-                       fg='red').grid(row=4, column=0, columnspan=2)
+                       fg='red').grid(row=4, column=0)
+        tkinter.Button(inputFrame, text="Annuler",
+                       command=self.cancelConversions).grid(row=4, column=1)
         inputFrame.pack(side = tkinter.TOP, fill="both", expand="yes")
 
-        # Pour affichage des messages de lecture
+        # Progression des conversions
+        progressFrame = tkinter.LabelFrame(mainFrame, text="Progression")
+        self.progressBar = ttk.Progressbar(progressFrame, mode='indeterminate', length=500)
+        self.progressBar.pack(side = tkinter.TOP)
+        self.progressLabel = tkinter.Label(progressFrame, text="Aucune conversion en cours")
+        self.progressLabel.pack(side = tkinter.TOP)
+        progressFrame.pack(side = tkinter.TOP, fill="both", expand="yes")
+
+        # Pour affichage des messages de lecture : seules les lignes visibles sont créées
         messageFrame = tkinter.LabelFrame(mainFrame, text="Affichage des messages de lecture")
-        self.messagesListbox = tkinter.Listbox(messageFrame,
-                                               background="green yellow",
-                                               height=10, width=70)
-        self.messagesListbox.grid(row=0, columnspan=2)
-        scrollbarRightMessages = tkinter.Scrollbar(messageFrame, orient=tkinter.VERTICAL,
-                                   command=self.messagesListbox.yview)
-        scrollbarRightMessages.grid(row=0, column=2, sticky=tkinter.W+tkinter.N+tkinter.S)
-        self.messagesListbox.config(yscrollcommand=scrollbarRightMessages.set)
-        scrollbarBottomMessages = tkinter.Scrollbar(messageFrame, orient=tkinter.HORIZONTAL,
-                                        command=self.messagesListbox.xview)
-        scrollbarBottomMessages.grid(row=1, columnspan=2, sticky=tkinter.N+tkinter.E+tkinter.W)
-        self.messagesListbox.config(xscrollcommand=scrollbarBottomMessages.set)
+        self.messagesList = PagedListbox(messageFrame, "green yellow", 10, 70,
+                                         self.formatMessage)
         messageFrame.pack(side = tkinter.TOP, fill="both", expand="yes")
 
-        # Pour affichage des éléments lus
+        # Pour affichage des éléments lus, filtrés par nom ou commune
         elementsFrame = tkinter.LabelFrame(mainFrame, text="elements trouvés dans le fichier")
-        self.elementsListbox = tkinter.Listbox(elementsFrame,
-                                       background="light blue",
-                                       height=10, width=70)
-        self.elementsListbox.grid(row=0, columnspan=2)
-        scrollbarRightelements = tkinter.Scrollbar(elementsFrame, orient=tkinter.VERTICAL,
-                                                  command=self.elementsListbox.yview)
-        scrollbarRightelements.grid(row=0, column=2, sticky=tkinter.W+tkinter.N+tkinter.S)
-        self.elementsListbox.config(yscrollcommand=scrollbarRightelements.set)
-        scrollbarBottomelements = tkinter.Scrollbar(elementsFrame, orient=tkinter.HORIZONTAL,
-                                                   command=self.elementsListbox.xview)
-        scrollbarBottomelements.grid(row=1, columnspan=2, sticky=tkinter.N+tkinter.E+tkinter.W)
-        self.elementsListbox.config(xscrollcommand=scrollbarBottomelements.set)
+        self.elementsList = PagedListbox(elementsFrame, "light blue", 10, 70,
+                                         self.formatElement)
         elementsFrame.pack(side = tkinter.TOP, fill="both", expand="yes")
 
         statusFrame = tkinter.LabelFrame(mainFrame, text="Messages")
@@ -665,6 +2956,8 @@ class table2kmlGUI():
                         initialdir=lastDir,
                         filetypes = [("Fichier CSV","*.csv"),
                                      ("Fichier Excel","*.xls"),
+                                     ("Fichier Excel","*.xlsx"),
+                                     ("Fichier Parquet","*.parquet"),
                                      ("All", "*")],
                         title="Selectionnez un fichier de configuration")
         if fileName:
@@ -692,42 +2985,121 @@ class table2kmlGUI():
         self.urlPictoVar.set(self.URL_PICTO_DEFAULT)
 
     def launchInputFileReader(self, event=None):
-        """ Update list according input files
-            v2.0:Thread use"""
+        """ Ajoute le fichier à la file des conversions en tâche de fond :
+            la fenêtre reste active, les fichiers sont convertis un à un
+            par le thread runConversions """
         # pylint: disable=W0613
-        self.setMessageLabel("Lecture du fichier en cours, veuillez patienter...")
-        import tkinter
-
         pathFicTable = self.pathInputFileVar.get()
-        try :
-            self.listMessage, self.listInfoRead = \
-                processFile(self.canUseXLS, pathFicTable,
-                            self.titleKMLEntry.get(), self.urlPictoEntry.get(),
-                            self.includePicto, self.isVerbose)
-            if len(self.listInfoRead) == 0:
-                raise ValueError("Aucun élément trouvé dans le fichier !")
-
-            # Update message list
-            self.messagesListbox.delete(0, tkinter.END)
-            for message in self.listMessage:
-                self.messagesListbox.insert(tkinter.END,
-                                            "Ligne " + str(message['numLigne']) +
-                                            " : " + message['texte'])
-            # Update élément list
-            self.elementsListbox.delete(0, tkinter.END)
-            for element in self.listInfoRead:
-                self.elementsListbox.insert(tkinter.END,
-                                           element['Commune'] + " : " + element['nom'])
-
-            self.setMessageLabel("Fichier converti en .kml : " +
-                                 str(len(self.listMessage)) +
-                                 " messages, " + str(len(self.listInfoRead)) +
-                                 " elements lus dans : " +
-                                 os.path.basename(pathFicTable))
-        except IOError as exc:
-            self.setMessageLabel(str(exc), isError=True)
-        except ValueError as exc:
-            self.setMessageLabel(str(exc), isError=True)
+        job = {'pathFicTable':pathFicTable,
+               'titleKML':self.titleKMLEntry.get(), 'URLPicto':self.urlPictoEntry.get(),
+               'includePicto':self.includePicto, 'isVerbose':self.isVerbose,
+               'cancelEvent':threading.Event()}
+        self.listJobs.append(job)
+        self.jobQueue.put(job)
+        if self.workerThread is None:
+            self.workerThread = threading.Thread(target=self.runConversions, daemon=True)
+            self.workerThread.start()
+        if not self.isPolling:
+            self.isPolling = True
+            self.root.after(_PERIOD_POLL_GUI_, self.pollConversions)
+        self.setMessageLabel("Fichier ajouté à la file des conversions : " +
+                             os.path.basename(pathFicTable) + " (" +
+                             str(len(self.listJobs)) + " en cours ou en attente)")
+
+    def cancelConversions(self):
+        """ Annule la conversion en cours et celles en attente """
+        for job in self.listJobs:
+            job['cancelEvent'].set()
+        if self.listJobs:
+            self.setMessageLabel("Annulation des conversions demandée...")
+
+    def runConversions(self):
+        """ Thread de conversion : convertit les fichiers de jobQueue un à un
+            et informe l'IHM par eventQueue, sans jamais appeler tkinter """
+        while True:
+            job = self.jobQueue.get()
+            if job['cancelEvent'].is_set():
+                self.eventQueue.put(('cancelled', job))
+                continue
+            startTime = time.perf_counter()
+
+            def progress(nbRows, job=job, startTime=startTime):
+                """ Transmet la progression et interrompt la conversion annulée """
+                if job['cancelEvent'].is_set():
+                    raise ValueError("Conversion annulée")
+                duration = time.perf_counter() - startTime
+                self.eventQueue.put(('progress', job, nbRows,
+                                     nbRows / duration if duration > 0. else 0.))
+
+            try :
+                listMessage, listInfoRead = \
+                    processFile(self.canUseXLS, job['pathFicTable'],
+                                job['titleKML'], job['URLPicto'],
+                                job['includePicto'], job['isVerbose'],
+                                progressCallback=progress)
+                if len(listInfoRead) == 0:
+                    raise ValueError("Aucun élément trouvé dans le fichier !")
+                self.eventQueue.put(('done', job, listMessage, listInfoRead))
+            except Exception as exc: # pylint: disable=W0703
+                if job['cancelEvent'].is_set():
+                    self.eventQueue.put(('cancelled', job))
+                else:
+                    self.eventQueue.put(('error', job, str(exc)))
+
+    def pollConversions(self):
+        """ Lit les messages du thread de conversion et met à jour l'IHM,
+            relancé par root.after tant que des conversions sont en cours """
+        try:
+            while True:
+                event = self.eventQueue.get_nowait()
+                kind, job = event[0], event[1]
+                nameFile = os.path.basename(job['pathFicTable'])
+                if kind == 'progress':
+                    self.progressBar.step()
+                    self.progressLabel['text'] = (nameFile + " : " + str(event[2]) +
+                                                  " lignes lues, " + str(int(event[3])) +
+                                                  " lignes/s - " +
+                                                  str(len(self.listJobs) - 1) +
+                                                  " fichier(s) en attente")
+                    continue
+
+                self.listJobs.remove(job)
+                if kind == 'done':
+                    self.listMessage, self.listInfoRead = event[2], event[3]
+                    self.showResults()
+                    self.setMessageLabel("Fichier converti en .kml : " +
+                                         str(len(self.listMessage)) +
+                                         " messages, " + str(len(self.listInfoRead)) +
+                                         " elements lus dans : " + nameFile)
+                elif kind == 'cancelled':
+                    self.setMessageLabel("Conversion annulée : " + nameFile)
+                else:
+                    self.setMessageLabel(nameFile + " : " + event[2], isError=True)
+        except queue.Empty:
+            pass
+
+        if self.listJobs:
+            self.root.after(_PERIOD_POLL_GUI_, self.pollConversions)
+        else:
+            self.isPolling = False
+            self.progressBar.stop()
+            self.progressBar['value'] = 0
+            self.progressLabel['text'] = "Aucune conversion en cours"
+
+    def showResults(self):
+        """ Affiche les messages et les éléments de la dernière conversion """
+        self.messagesList.setItems(self.listMessage)
+        self.elementsList.setItems(self.listInfoRead)
+
+    @staticmethod
+    def formatMessage(message):
+        """ Texte d'un message de lecture dans la liste """
+        return "Ligne " + str(message['numLigne']) + " : " + message['texte']
+
+    @staticmethod
+    def formatElement(element):
+        """ Texte d'un élément lu dans la liste """
+        return element['Commune'] + " : " + element['nom']
 
     def setMessageLabel(self, message, isError=False) :
         """ set a message for user. """
@@ -0,0 +1,158 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+*********************************************************
+Programme : table2kmlClient.py
+Github : https://github.com/Thierry46/table2kml
+Auteur : Thierry Maillard (TMD)
+Date : 11/12/2021
+
+Role : Client léger du serveur de conversion table2kml.py --server :
+        envoie les fichiers à convertir au serveur déjà lancé, qui les convertit
+        sans payer le démarrage de Python ni l'import des modules à chaque fichier.
+
+Prerequis :
+- Python v3.xxx : a télécharger depuis : https://www.python.org/downloads/
+- Un serveur lancé sur la même machine : table2kml.py --server [--port port] [options]
+  Les options de conversion (-i, -z, -f, -d, -t, -p ...) sont celles du serveur.
+
+Usage : table2kmlClient.py [-h] [-v] [-P port] [-t Nom_calque] [-p url_picto]
+                           Chemin [Chemin ...]
+Parametres :
+    -h ou --help : affiche cette aide.
+    -v ou --verbose : mode bavard
+    -P ou --port port : port local du serveur (défaut : 8146)
+    -t ou --title Nom_calque : titre des calques (défaut : celui du serveur,
+         à défaut le nom du fichier)
+    -p ou --picto url_picto : pictogramme des calques (défaut : celui du serveur)
+    Chemins des fichiers .csv, .xls, .xlsx, .parquet ou .arrow à convertir
+
+Sortie :
+    - Fichiers écrits par le serveur à côté des fichiers d'entrée
+    - Un bilan par fichier, code retour 3 si un fichier est en erreur,
+      2 si le serveur est injoignable.
+
+Un ordonnanceur peut aussi envoyer directement la requête au serveur :
+    POST http://127.0.0.1:8146/conversion
+    {"pathFicTable": "/chemin/absolu/Dolmen.csv", "titleKML": "Dolmens"}
+
+Exemple :
+./table2kml.py --server -j 4 &
+./table2kmlClient.py data/*.csv
+
+Copyright 2021 Thierry Maillard
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+Contact me at thierry.maillard500n@orange.fr
+*********************************************************
+"""
+import sys
+import getopt
+import os.path
+import json
+import urllib.request
+import urllib.error
+import concurrent.futures
+
+# Port par défaut du serveur : _PORT_SERVER_ de table2kml.py
+_PORT_SERVER_ = 8146
+
+def main(argv=None):
+    """ Methode principale """
+    isVerbose = False
+    port = _PORT_SERVER_
+    titleKML = None
+    URLPicto = None
+
+    if argv is None:
+        argv = sys.argv
+
+    try:
+        opts, args = getopt.getopt(argv[1:], "hvP:t:p:",
+                                   ["help", "verbose", "port=", "title=", "picto="])
+    except getopt.error as msg:
+        print(msg)
+        print("To get help use --help ou -h")
+        sys.exit(1)
+    for options in opts:
+        if options[0] in ("-h", "--help"):
+            print(__doc__)
+            sys.exit(0)
+
+        if options[0] in ("-v", "--verbose"):
+            isVerbose = True
+
+        if options[0] in ("-P", "--port"):
+            try:
+                port = int(options[1])
+            except ValueError:
+                print("Port du serveur incorrect :", options[1])
+                sys.exit(1)
+
+        if options[0] in ("-t", "--title"):
+            titleKML = options[1]
+
+        if options[0] in ("-p", "--picto"):
+            URLPicto = options[1]
+
+    if len(args) < 1:
+        print(__doc__)
+        print("Nombre de paramètre invalide : au moins un fichier à convertir")
+        sys.exit(1)
+
+    # Requêtes simultanées : le serveur les répartit sur ses processus
+    URLServer = "http://127.0.0.1:" + str(port) + "/conversion"
+    nbErrors = 0
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(args), 8)) as executor:
+            for result in executor.map(lambda path: sendJob(URLServer, path, titleKML,
+                                                            URLPicto, isVerbose), args):
+                if result['isOK']:
+                    print("OK     :", result['pathFicTable'], ":", result['nbElements'],
+                          "éléments,", result['nbMessages'], "lignes ignorées")
+                else:
+                    nbErrors += 1
+                    print("ERREUR :", result['pathFicTable'], ":", result['error'])
+    except urllib.error.URLError as exc:
+        print("Serveur de conversion injoignable :", URLServer, ":", str(exc.reason))
+        print("Lancez-le par : table2kml.py --server")
+        sys.exit(2)
+    sys.exit(3 if nbErrors > 0 else 0)
+
+def sendJob(URLServer, pathFicTable, titleKML, URLPicto, isVerbose):
+    """ Envoie au serveur la conversion de pathFicTable et retourne son bilan """
+    job = {'pathFicTable':os.path.abspath(pathFicTable)}
+    if titleKML is not None:
+        job['titleKML'] = titleKML
+    if URLPicto is not None:
+        job['URLPicto'] = URLPicto
+    if isVerbose:
+        print("Envoi de", job['pathFicTable'], "à", URLServer)
+    request = urllib.request.Request(URLServer, data=json.dumps(job).encode('utf-8'),
+                                     headers={'Content-Type':'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            result = json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as exc:
+        # Requête refusée : le bilan d'erreur est dans le corps de la réponse
+        try:
+            result = json.loads(exc.read().decode('utf-8'))
+        except ValueError:
+            result = {'isOK':False, 'error':str(exc)}
+    # Bilans d'erreur du serveur sans chemin (requête invalide) : chemin envoyé
+    result.setdefault('pathFicTable', pathFicTable)
+    result.setdefault('nbElements', 0)
+    result.setdefault('nbMessages', 0)
+    return result
+
+#to be called as a script:python table2kmlClient.py or table2kmlClient.py
+if __name__ == "__main__":
+    main()
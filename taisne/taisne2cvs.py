@@ -18,16 +18,25 @@
     pdfminer :
     sudo python -m pip install pdfminer
     pdf2txt.py -o taisne.txt taisne.pdf 795 Ko
+    - module pyarrow (facultatif, option -p) : sudo python3 -m pip install pyarrow
 
-    Usage : taisne2cvs.py [-h] [-v] taisne.txt
+    Usage : taisne2cvs.py [-h] [-v] [-p] [--profile=rapport.json] [--cprofile=fichier.prof]
+                          taisne.txt
 
     Parametres :
     -h ou --help : affiche cette aide.
     -v ou --verbose : mode bavard
+    -p ou --parquet : écrit aussi les résultats au format colonnes Parquet
+    --profile=rapport.json : mesure chaque étape (analyse du texte, conversion des
+         coordonnées et écriture CSV, écriture Parquet) : temps écoulé, temps CPU,
+         lignes/s et octets, écrits dans le fichier JSON rapport.json
+    --cprofile=fichier.prof : profile le programme avec cProfile et écrit les statistiques
+         dans fichier.prof (lire avec : python3 -m pstats fichier.prof)
     Nom d'un fichier de données .txt
 
     Sortie :
     - Fichier de même nom que fichier d'entrée mais avec extension .csv
+    - Avec -p, fichier de même nom avec extension .parquet, coordonnées numériques
 
     Copyright 2017 Thierry Maillard
     This program is free software: you can redistribute it and/or modify
@@ -49,11 +58,34 @@ import platform
 import getopt
 import os.path
 import math
-import imp
+import importlib.util
+import functools
 import re
 import csv
+import time
+import contextlib
+import json
 
 _PREC_COORD_DEC_ = 6
+_PROJ_WGS84_ = '+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs'
+_PROJ_LAMBERT3_ = '+proj=lcc +nadgrids=ntf_r93.gsb,null +towgs84=-168.0000,-60.0000,320.0000 +a=6378249.2000 +rf=293.4660210000000 +pm=2.337229167 +lat_0=44.100000000 +lon_0=0.000000000 +k_0=0.99987750 +lat_1=44.100000000 +x_0=600000.000 +y_0=3200000.000 +units=m +no_defs'
+
+# Mesures des étapes, écrites dans le rapport de l'option --profile
+_LIST_STAGES_ = []
+
+@contextlib.contextmanager
+def measureStage(name, pathFile=""):
+    """ Mesure les temps écoulé et CPU du bloc with et l'ajoute à _LIST_STAGES_ :
+        l'appelant complète nbRows et nbBytes dans le dictionnaire retourné """
+    infoStage = {'stage' : name, 'file' : pathFile, 'nbRows' : 0, 'nbBytes' : 0}
+    startWall = time.perf_counter()
+    startCPU = time.process_time()
+    yield infoStage
+    infoStage['wallTime'] = time.perf_counter() - startWall
+    infoStage['cpuTime'] = time.process_time() - startCPU
+    infoStage['rowsPerSecond'] = (infoStage['nbRows'] / infoStage['wallTime']
+                                  if infoStage['wallTime'] > 0. else 0.)
+    _LIST_STAGES_.append(infoStage)
 
 ##################################################
 # main function
@@ -62,16 +94,18 @@ def main(argv=None):
     VERSION = 'v1.4 - 18/11/2017'
     NOM_PROG = 'taisne2cvs.py'
     isVerbose = False
+    isParquet = False
+    pathProfile = None
+    profiler = None
     title = NOM_PROG + ' - ' + VERSION + " sur " + platform.system() + " " + platform.release() + \
         " - Python : " + platform.python_version()
     print(title)
 
-    try :
-        imp.find_module('simplekml')
+    if importlib.util.find_spec("pyproj") is not None:
         print("Module pyproj OK : Conversion coordonnées Lambert3 -> WGS84 autorisé")
-    except ImportError as exc:
+    else:
         print(__doc__)
-        print("Erreur ! module pyproj pas disponible :", exc)
+        print("Erreur ! module pyproj pas disponible")
         sys.exit(1)
 
     if argv is None:
@@ -80,7 +114,8 @@ def main(argv=None):
     # parse command line options
     dirProject = os.path.dirname(os.path.abspath(sys.argv[0]))
     try:
-        opts, args = getopt.getopt(argv[1:], "hv", ["help", "verbose"])
+        opts, args = getopt.getopt(argv[1:], "hvp", ["help", "verbose", "parquet",
+                                                     "profile=", "cprofile="])
     except getopt.error as msg:
         print(msg)
         print("To get help use --help ou -h")
@@ -95,8 +130,37 @@ def main(argv=None):
             isVerbose = True
             print("Mode verbose : bavard pour debug")
 
+        if o in ("-p", "--parquet"):
+            if importlib.util.find_spec("pyarrow") is None:
+                print("Erreur ! module pyarrow pas disponible")
+                sys.exit(1)
+            isParquet = True
+            print("Ecriture des résultats aussi au format Parquet")
+
+        if o == "--profile":
+            pathProfile = a
+            print("Mesure des étapes, rapport :", pathProfile)
+
+        if o == "--cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            pathCProfile = a
+            print("Profilage cProfile, fichier :", pathCProfile)
+
     if len(args) == 1:
-        processFile(args[0], isVerbose)
+        if profiler is not None:
+            profiler.enable()
+        processFile(args[0], isVerbose, isParquet)
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(pathCProfile)
+            print("Statistiques cProfile écrites :", pathCProfile)
+        if pathProfile is not None:
+            with open(pathProfile, 'w', encoding='utf-8') as hReport:
+                json.dump({'program' : NOM_PROG, 'version' : VERSION,
+                           'date' : time.strftime("%Y-%m-%dT%H:%M:%S"),
+                           'stages' : _LIST_STAGES_}, hReport, indent=2, ensure_ascii=False)
+            print("Rapport de profilage écrit :", pathProfile)
     else:
         print(__doc__)
         print("Nombre de paramètre invalide : 1 nécessaires : chemin fichier Taisne")
@@ -105,9 +169,10 @@ def main(argv=None):
     print('End', NOM_PROG, VERSION)
     sys.exit(0)
 
-def processFile(pathFicTaisne, isVerbose):
+def processFile(pathFicTaisne, isVerbose, isParquet=False):
     """ Extrait les infos du fichier taisne passé en paramètre
         et produit un fichier .csv
+        isParquet : produit aussi un fichier .parquet
         """
     if not pathFicTaisne.endswith(".txt"):
         raise ValueError("Extension du fichier non supporté :" +
@@ -153,7 +218,9 @@ def processFile(pathFicTaisne, isVerbose):
         description = ""
         plan = ""
         listeCoordEntree = []
-        with open(pathFicTaisne, 'r') as hFicTaisne:
+        listCaveRows = []
+        with measureStage("analyse", pathFicTaisne) as infoStage, \
+             open(pathFicTaisne, 'r') as hFicTaisne:
             for numLine, line in enumerate(hFicTaisne.read().splitlines()):
                 ignoreLine = False
                 error = False
@@ -186,8 +253,8 @@ def processFile(pathFicTaisne, isVerbose):
                     match = regexpCaveName.search(line)
                     if match:
                         if caveOk:
-                            writeCave(writer, caveName, startCaveName, alias, commune, IGN,
-                                      listeCoordEntree, description, numPage, plan, isVerbose)
+                            addCave(listCaveRows, caveName, startCaveName, alias, commune, IGN,
+                                    listeCoordEntree, description, numPage, plan, isVerbose)
                             nbCaviteOK += 1
                             caveOk = False
                             wait4Description = False
@@ -227,13 +294,10 @@ def processFile(pathFicTaisne, isVerbose):
                             message = 'coordonnée sur mauvaise ligne : '
                             error = True
                         else:
-                            xLambert3, yLambert3, longitude, latitude = \
-                                    parseCoordinates(match, numLine, isVerbose)
+                            xLambert3, yLambert3 = parseCoordinates(match, numLine, isVerbose)
                             listeCoordEntree = [{'nom':"",
                                                 'xLambert3':xLambert3,
                                                 'yLambert3':yLambert3,
-                                                'longitude':longitude,
-                                                'latitude':latitude,
                                                 'altitude':match.group('altitude')
                                                 }]
 
@@ -251,13 +315,10 @@ def processFile(pathFicTaisne, isVerbose):
                             message = 'coordonnée sous grotte sur mauvaise ligne : '
                             error = True
                         else:
-                            xLambert3, yLambert3, longitude, latitude = \
-                                parseCoordinates(match, numLine, isVerbose)
+                            xLambert3, yLambert3 = parseCoordinates(match, numLine, isVerbose)
                             listeCoordEntree.append({'nom':match.group('sousGrotte'),
                                                 'xLambert3':xLambert3,
                                                 'yLambert3':yLambert3,
-                                                'longitude':longitude,
-                                                'latitude':latitude,
                                                 'altitude':match.group('altitude')
                                                 })
 
@@ -272,13 +333,10 @@ def processFile(pathFicTaisne, isVerbose):
                             message = 'coordonnée sous grotte sur mauvaise ligne : '
                             error = True
                         else:
-                            xLambert3, yLambert3, longitude, latitude = \
-                                parseCoordinates(match, numLine, isVerbose)
+                            xLambert3, yLambert3 = parseCoordinates(match, numLine, isVerbose)
                             listeCoordEntree.append({'nom':match.group('sousGrotte'),
                                                     'xLambert3':xLambert3,
                                                     'yLambert3':yLambert3,
-                                                    'longitude':longitude,
-                                                    'latitude':latitude,
                                                     'altitude':match.group('altitude')
                                                     })
                             IGN = match.group('IGN')
@@ -314,26 +372,41 @@ def processFile(pathFicTaisne, isVerbose):
                     error = False
 
             if caveOk:
-                writeCave(writer, caveName, startCaveName, alias, commune, IGN,
-                          listeCoordEntree, description, numPage, plan, isVerbose)
+                addCave(listCaveRows, caveName, startCaveName, alias, commune, IGN,
+                        listeCoordEntree, description, numPage, plan, isVerbose)
                 nbCaviteOK += 1
             print("Nombre de cavité extraites :", nbCaviteOK)
+            infoStage['nbRows'] = len(listCaveRows)
+            infoStage['nbBytes'] = os.path.getsize(pathFicTaisne)
+
+        # Conversion de toutes les coordonnées des entrées en un seul appel
+        with measureStage("conversion et écriture csv", pathFicTaisneCSV) as infoStage:
+            listRows = writeCaves(writer, listCaveRows, isVerbose)
+            infoStage['nbRows'] = len(listRows)
+            hFicCSV.flush()
+            infoStage['nbBytes'] = hFicCSV.tell()
+
+    if isParquet:
+        pathFicParquet = pathFicTaisne.replace(".txt", ".parquet")
+        with measureStage("écriture parquet", pathFicParquet) as infoStage:
+            writeParquet(pathFicParquet, columnTitle, listRows)
+            infoStage['nbRows'] = len(listRows)
+            infoStage['nbBytes'] = os.path.getsize(pathFicParquet)
 
 def parseCoordinates(match, numLine, isVerbose):
+    """ Extrait les coordonnées Lambert3 (km) d'une ligne
+        La conversion en WGS84 est faite pour toutes les entrées dans writeCaves """
     xLambert3 = float(match.group('Xe')) + float(match.group('Xd')) / 100.
     yLambert3 = 3000. + float(match.group('Ye')) + float(match.group('Yd')) / 100.
-    longitude, latitude = lambert3ToWGS84(xLambert3 * 1000., yLambert3 * 1000.)
     altitude = float(match.group('altitude'))
     if isVerbose:
-        print(numLine+1,
-              'Lambert3 :', xLambert3, yLambert3,
-              'WGS84 :', longitude, latitude)
+        print(numLine+1, 'Lambert3 :', xLambert3, yLambert3)
         print('Altitude :', altitude)
-    return xLambert3, yLambert3, longitude, latitude
+    return xLambert3, yLambert3
 
-def writeCave(writer, caveName, startCaveName, alias, commune, IGN,
-              listeCoordEntree, description, numPage, plan, isVerbose):
-    # Ecrit la cavite précedente
+def addCave(listCaveRows, caveName, startCaveName, alias, commune, IGN,
+            listeCoordEntree, description, numPage, plan, isVerbose):
+    """ Enregistre une ligne par entrée de la cavite précedente dans listCaveRows """
     nom = startCaveName
     if not startCaveName.endswith("'"):
         nom += " "
@@ -348,11 +421,45 @@ def writeCave(writer, caveName, startCaveName, alias, commune, IGN,
         nomEntree = nom
         if entree['nom'] != "":
             nomEntree += ' : ' + entree['nom']
-        writer.writerow([nomEntree, alias, commune, IGN,
-                     entree['xLambert3'], entree['yLambert3'],
-                     entree['latitude'], entree['longitude'],
-                     entree['altitude'], description, numPage, plan])
-
+        listCaveRows.append([nomEntree, alias, commune, IGN,
+                             entree['xLambert3'], entree['yLambert3'],
+                             entree['altitude'], description, numPage, plan])
+
+def writeCaves(writer, listCaveRows, isVerbose):
+    """ Convertit en WGS84 les coordonnées de toutes les entrées
+        et écrit les lignes dans le fichier CSV
+        Retourne la liste des lignes écrites """
+    listLongitude, listLatitude = lambert3ToWGS84Batch(
+        [caveRow[4] * 1000. for caveRow in listCaveRows],
+        [caveRow[5] * 1000. for caveRow in listCaveRows])
+
+    listRows = []
+    for caveRow, longitude, latitude in zip(listCaveRows, listLongitude, listLatitude):
+        if isVerbose:
+            print(caveRow[0], 'Lambert3 :', caveRow[4], caveRow[5],
+                  'WGS84 :', longitude, latitude)
+        listRows.append(caveRow[:6] + [latitude, longitude] + caveRow[6:])
+    writer.writerows(listRows)
+    return listRows
+
+def writeParquet(pathFicParquet, columnTitle, listRows):
+    """ Ecrit les lignes dans un fichier Parquet, une colonne par titre
+        Les coordonnées et l'altitude restent numériques """
+    import pyarrow
+    import pyarrow.parquet
+
+    print("Ecriture de", pathFicParquet, "...")
+    columns = [pyarrow.array([row[numCol] for row in listRows])
+               for numCol in range(len(columnTitle))]
+    pyarrow.parquet.write_table(pyarrow.Table.from_arrays(columns, names=columnTitle),
+                                pathFicParquet)
+
+@functools.lru_cache(maxsize=1)
+def getTransformerLambert3():
+    """ Construit une seule fois la transformation Lambert3 -> WGS84
+        Ref : https://pyproj4.github.io/pyproj/stable/api/transformer.html """
+    import pyproj
+    return pyproj.Transformer.from_crs(_PROJ_LAMBERT3_, _PROJ_WGS84_, always_xy=True)
 
 def lambert3ToWGS84(xLambert3, yLambert3):
     """ Convertit des coordonnées Lambert3 : X (m), Y (m)
@@ -360,12 +467,20 @@ def lambert3ToWGS84(xLambert3, yLambert3):
         En coordonnées géographiques WGS84 longitude E, latitude N (degrés décimaux)
         Ref : https://rcomman.de/conversion-de-coordonnees-geographiques-en-python.html
     """
-    import pyproj
-    wgs84 = pyproj.Proj('+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs')
-    lambert = pyproj.Proj('+proj=lcc +nadgrids=ntf_r93.gsb,null +towgs84=-168.0000,-60.0000,320.0000 +a=6378249.2000 +rf=293.4660210000000 +pm=2.337229167 +lat_0=44.100000000 +lon_0=0.000000000 +k_0=0.99987750 +lat_1=44.100000000 +x_0=600000.000 +y_0=3200000.000 +units=m +no_defs')
-    longitude, latitude = pyproj.transform(lambert, wgs84, xLambert3, yLambert3)
+    longitude, latitude = getTransformerLambert3().transform(xLambert3, yLambert3)
     return round(longitude, _PREC_COORD_DEC_), round(latitude, _PREC_COORD_DEC_)
 
+def lambert3ToWGS84Batch(listXLambert3, listYLambert3):
+    """ Convertit en un seul appel des listes de coordonnées Lambert3 : X (m), Y (m)
+        Retourne les listes des longitudes E et latitudes N WGS84 (degrés décimaux)
+    """
+    if len(listXLambert3) == 0:
+        return [], []
+    listLongitude, listLatitude = getTransformerLambert3().transform(listXLambert3,
+                                                                     listYLambert3)
+    return ([round(longitude, _PREC_COORD_DEC_) for longitude in listLongitude],
+            [round(latitude, _PREC_COORD_DEC_) for latitude in listLatitude])
+
 #to be called as a script:python taisne2cvs.py or taisne2cvs.py
 if __name__ == "__main__":
     main()